@@ -0,0 +1,39 @@
+import argparse
+import json
+import timeit
+
+from benchmarks.payloads import make_tasks_payload
+from bot.utils.json_codec import JsonCodec, orjson
+
+
+def bench(backend: str, body: bytes, number: int) -> tuple[float, float]:
+    codec = JsonCodec(backend)
+    data = codec.loads(body)
+    loads = min(timeit.repeat(lambda: codec.loads(body), number=number, repeat=5)) / number
+    dumps = min(timeit.repeat(lambda: codec.dumps(data), number=number, repeat=5)) / number
+    return loads, dumps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare JSON backends on a /api/v1/tasks sized payload")
+    parser.add_argument("--scale", type=int, default=1, help="Payload size multiplier")
+    parser.add_argument("-n", "--number", type=int, default=200, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    body = json.dumps(make_tasks_payload(scale=args.scale)).encode()
+    print(f"payload: {len(body) / 1024:.1f} KiB")
+
+    backends = ['json'] + (['orjson'] if orjson is not None else [])
+    results = {backend: bench(backend, body, args.number) for backend in backends}
+
+    base_loads, base_dumps = results['json']
+    for backend, (loads, dumps) in results.items():
+        print(f"{backend:>7}: loads {loads * 1e6:8.1f} us ({base_loads / loads:4.1f}x) | "
+              f"dumps {dumps * 1e6:8.1f} us ({base_dumps / dumps:4.1f}x)")
+
+    if orjson is None:
+        print("orjson is not installed, only the stdlib backend was measured")
+
+
+if __name__ == '__main__':
+    main()
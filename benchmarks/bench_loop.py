@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+from statistics import quantiles
+from time import monotonic, process_time
+
+from bot.utils.event_loop import EVENT_LOOPS, install_event_loop
+
+LAG_PROBE_INTERVAL = 0.05
+
+
+async def run_load(base_url: str, sessions: int, duration: float, idle: float) -> dict:
+    from benchmarks.standin import SimulatedTapper, simulate_cycle
+
+    tappers = [SimulatedTapper(f"sim-{i}", base_url) for i in range(sessions)]
+    stop_at = monotonic() + duration
+    lags = []
+    requests = 0
+    errors = 0
+
+    async def session_loop(tapper: SimulatedTapper) -> None:
+        nonlocal requests, errors
+        await asyncio.sleep(random.uniform(0, idle))
+        while monotonic() < stop_at:
+            try:
+                made = await simulate_cycle(tapper)
+                requests += made
+            except Exception:
+                errors += 1
+            await asyncio.sleep(random.uniform(0, idle))
+
+    async def lag_probe() -> None:
+        while monotonic() < stop_at:
+            started = monotonic()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lags.append(monotonic() - started - LAG_PROBE_INTERVAL)
+
+    cpu_started = process_time()
+    wall_started = monotonic()
+    await asyncio.gather(lag_probe(), *(session_loop(tapper) for tapper in tappers))
+    wall = monotonic() - wall_started
+    cpu = process_time() - cpu_started
+
+    cuts = quantiles(lags, n=100) if len(lags) > 1 else [0.0] * 99
+    return {
+        'requests_per_second': requests / wall,
+        'errors': errors,
+        'lag_p50_ms': cuts[49] * 1000,
+        'lag_p99_ms': cuts[98] * 1000,
+        'lag_max_ms': max(lags, default=0.0) * 1000,
+        'cpu_seconds': cpu,
+        'cores_per_1000_sessions': cpu / wall * 1000 / sessions,
+        'cpu_ms_per_1000_requests': cpu * 1000 / max(requests, 1) * 1000,
+    }
+
+
+def child(args) -> None:
+    from benchmarks.standin import quiet_logs
+
+    quiet_logs()
+    loop = install_event_loop(args.loop)
+    result = asyncio.run(run_load(args.base_url, args.sessions, args.duration, args.idle))
+    result['loop'] = loop
+    print(json.dumps(result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare event loops on a simulated fleet against the local stand-in")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per loop")
+    parser.add_argument("--idle", type=float, default=5, help="Max idle time between a session's cycles")
+    parser.add_argument("--tasks-scale", type=int, default=1)
+    parser.add_argument("--loop", choices=EVENT_LOOPS, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.base_url:
+        return child(args)
+
+    from benchmarks.standin import spawn_standin
+
+    server, base_url = spawn_standin(tasks_scale=args.tasks_scale)
+    results = []
+    try:
+        for loop in EVENT_LOOPS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_loop', '--loop', loop, '--base-url', base_url,
+                 '--sessions', str(args.sessions), '--duration', str(args.duration), '--idle', str(args.idle)],
+                capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            if result['loop'] != loop:
+                print(f"{loop} is not available, skipped")
+                continue
+            results.append(result)
+    finally:
+        server.terminate()
+
+    print(f"{args.sessions} sessions, {args.duration:.0f}s per loop, up to {args.idle:.0f}s idle between cycles")
+    print(f"{'loop':>8} | {'req/s':>8} | {'lag p50':>8} | {'lag p99':>8} | {'lag max':>8} | "
+          f"{'cores/1k sess':>13} | {'CPU ms/1k req':>13} | errors")
+    for result in results:
+        print(f"{result['loop']:>8} | {result['requests_per_second']:8.0f} | {result['lag_p50_ms']:6.1f}ms | "
+              f"{result['lag_p99_ms']:6.1f}ms | {result['lag_max_ms']:6.1f}ms | "
+              f"{result['cores_per_1000_sessions']:13.2f} | {result['cpu_ms_per_1000_requests']:13.0f} | "
+              f"{result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import uuid
+
+from benchmarks.standin import make_token, quiet_logs
+
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Peak RSS only, but it grows monotonically through this benchmark
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def settle() -> int:
+    gc.collect()
+    return rss_bytes()
+
+
+def make_idle_tapper(index: int, finished_tasks: int):
+    from bot.core.tapper import Tapper, create_tg_client
+
+    tapper = Tapper(tg_client=create_tg_client(f"bench-{index}"), proxy=None)
+    tapper.release_tg_client()
+    tapper.user_agent = f"Mozilla/5.0 (Linux; Android 12; SM-G99{index % 10}B) AppleWebKit/537.36 Mobile Safari/537.36"
+    tapper.sec_ch_ua = '"Android WebView";v="120", "Chromium";v="120", "Not_A Brand";v="24"'
+    tapper.tokens = (make_token(), make_token(86400))
+    tapper.user_id = 6_000_000_000 + index
+    tapper.ledger.finished_tasks = {str(uuid.uuid4()) for _ in range(finished_tasks)}
+    tapper.ledger.farming_end = 1.7e9
+    return tapper
+
+
+async def measure(accounts: int, finished_tasks: int) -> dict:
+    from pyrogram import Client
+    from bot.core.tapper import create_tg_client
+
+    baseline = settle()
+    tappers = [make_idle_tapper(index, finished_tasks) for index in range(accounts)]
+    idle = settle()
+
+    for tapper in tappers:
+        tapper.tg_client = create_tg_client(tapper.session_name)
+        tapper.open_http_client()
+    active = settle()
+
+    for tapper in tappers:
+        await tapper.close_http_client()
+        tapper.release_tg_client()
+    gc.collect()
+
+    per_1000 = 1000 / accounts
+    return {
+        'accounts': accounts,
+        'idle_rss_mb_per_1000': (idle - baseline) * per_1000 / 2 ** 20,
+        'active_rss_mb_per_1000': (active - baseline) * per_1000 / 2 ** 20,
+        'clients_alive_after_release': sum(1 for obj in gc.get_objects() if isinstance(obj, Client)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RSS of idle and active accounts")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--finished-tasks", type=int, default=40, help="Finished task ids kept in each ledger")
+    args = parser.parse_args()
+
+    quiet_logs()
+    result = asyncio.run(measure(args.accounts, args.finished_tasks))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import os
+import tempfile
+from time import monotonic, process_time
+
+from benchmarks.standin import SimulatedTapper, simulate_cycle, start_standin, quiet_logs
+from bot.core.cassette import CassetteRecorder, CassetteReplayer, load_cassette
+
+REPLAY_URL = 'http://replay.invalid'
+
+
+class RecordingTapper(SimulatedTapper):
+    def __init__(self, session_name: str, base_url: str, recorder: CassetteRecorder):
+        super().__init__(session_name, base_url)
+        self.recorder = recorder
+
+    def http_middlewares(self) -> list:
+        return [self.recorder]
+
+
+class ReplayTapper(SimulatedTapper):
+    def __init__(self, session_name: str, replayer: CassetteReplayer):
+        super().__init__(session_name, REPLAY_URL)
+        self.replayer = replayer
+
+    def http_middlewares(self) -> list:
+        return [self.replayer]
+
+
+async def record_standin_cassette(path: str, tasks_scale: int) -> None:
+    runner, base_url = await start_standin(tasks_scale=tasks_scale)
+    try:
+        tapper = RecordingTapper('standin', base_url, CassetteRecorder(path))
+        await simulate_cycle(tapper)
+    finally:
+        await runner.cleanup()
+
+
+async def replay(entries: list[dict], sessions: int, duration: float) -> dict:
+    replayer = CassetteReplayer(entries)
+    tappers = [ReplayTapper(f"replay-{i}", replayer) for i in range(sessions)]
+    stop_at = monotonic() + duration
+    cycles = requests = 0
+
+    async def session_loop(tapper: ReplayTapper) -> None:
+        nonlocal cycles, requests
+        while monotonic() < stop_at:
+            made = await simulate_cycle(tapper)
+            requests += made
+            cycles += 1
+
+    cpu_started = process_time()
+    wall_started = monotonic()
+    await asyncio.gather(*(session_loop(tapper) for tapper in tappers))
+    wall = monotonic() - wall_started
+    cpu = process_time() - cpu_started
+    return {'cycles_per_second': cycles / wall, 'requests_per_second': requests / wall,
+            'cpu_us_per_cycle': cpu * 1e6 / max(cycles, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded API responses through the cycle logic at full speed")
+    parser.add_argument("cassettes", nargs='*', help="Cassettes recorded with CASSETTE_DIR; "
+                                                     "one is recorded from the local stand-in if omitted")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--tasks-scale", type=int, default=1)
+    args = parser.parse_args()
+
+    quiet_logs()
+    cassettes = args.cassettes
+    if not cassettes:
+        cassettes = [os.path.join(tempfile.mkdtemp(prefix='blum-cassette-'), 'standin.jsonl.gz')]
+        asyncio.run(record_standin_cassette(cassettes[0], args.tasks_scale))
+
+    entries = [entry for path in cassettes for entry in load_cassette(path)]
+    # get_tasks retries until it gets a 2xx, so a cassette without one would spin forever
+    if not any(entry['url'] == '/api/v1/tasks' and entry['status'] in (200, 201) for entry in entries):
+        parser.error("the cassettes contain no successful GET /api/v1/tasks response")
+
+    result = asyncio.run(replay(entries, args.sessions, args.duration))
+    print(f"{len(entries)} recorded responses from {len(cassettes)} cassettes, {args.sessions} sessions")
+    print(f"{result['cycles_per_second']:.0f} cycles/s | {result['requests_per_second']:.0f} req/s | "
+          f"{result['cpu_us_per_cycle']:.0f} us CPU per cycle")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Compares the aiohttp and h2 transports on full cycles against the stand-in behind a local TLS front.
+
+Every Blum endpoint gets its own *.blum.test hostname, all resolving to the front, so the h2 transport can
+coalesce them the way it would coalesce the real hosts behind one CDN address.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import ssl
+import subprocess
+import tempfile
+from statistics import quantiles
+from time import monotonic, process_time
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from benchmarks.standin import URL_ATTRS, SimulatedTapper, quiet_logs, simulate_cycle, start_standin
+
+DOMAIN = 'blum.test'
+HOSTNAMES = dict(zip(URL_ATTRS, ('gateway', 'game-domain', 'wallet-domain', 'subscription', 'tribe-domain',
+                                 'user-domain', 'earn-domain')))
+# Shared counters of the front: connections, full TLS handshakes, HTTP/2 connections, HTTP/2 streams
+CONNECTIONS, HANDSHAKES, H2_CONNECTIONS, H2_STREAMS = range(4)
+
+
+def make_certificate(directory: str) -> tuple[str, str]:
+    cert, key = os.path.join(directory, 'front.pem'), os.path.join(directory, 'front.key')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1',
+                    '-nodes', '-days', '1', '-subj', f'/CN=*.{DOMAIN}', '-keyout', key, '-out', cert,
+                    '-addext', f'subjectAltName=DNS:*.{DOMAIN}'], check=True, capture_output=True)
+    return cert, key
+
+
+class LoopbackResolver(AbstractResolver):
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> list:
+        return [{'hostname': host, 'host': '127.0.0.1', 'port': port, 'family': socket.AF_INET,
+                 'proto': 0, 'flags': socket.AI_NUMERICHOST}]
+
+    async def close(self) -> None:
+        pass
+
+
+class Front:
+    """TLS front for the stand-in: pipes HTTP/1.1 connections through and serves HTTP/2 itself."""
+
+    def __init__(self, upstream: str, stats):
+        self.upstream_host, self.upstream_port = upstream.rsplit('//', 1)[1].split(':')
+        self.upstream = upstream
+        self.stats = stats
+        self.client: aiohttp.ClientSession | None = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        ssl_object = writer.get_extra_info('ssl_object')
+        self.stats[CONNECTIONS] += 1
+        if not ssl_object.session_reused:
+            self.stats[HANDSHAKES] += 1
+        try:
+            if ssl_object.selected_alpn_protocol() == 'h2':
+                self.stats[H2_CONNECTIONS] += 1
+                await self.serve_h2(reader, writer)
+            else:
+                await self.pipe(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        upstream_reader, upstream_writer = await asyncio.open_connection(self.upstream_host, int(self.upstream_port))
+
+        async def copy(source: asyncio.StreamReader, sink: asyncio.StreamWriter) -> None:
+            while data := await source.read(65536):
+                sink.write(data)
+                await sink.drain()
+            sink.close()
+
+        await asyncio.gather(copy(reader, upstream_writer), copy(upstream_reader, writer), return_exceptions=True)
+
+    async def serve_h2(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        from h2.config import H2Configuration
+        from h2.connection import H2Connection
+        from h2.events import DataReceived, RequestReceived, StreamEnded, WindowUpdated
+
+        connection = H2Connection(H2Configuration(client_side=False, header_encoding='utf-8'))
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+        requests: dict[int, tuple[dict, bytearray]] = {}
+        window_open = asyncio.Event()
+        responders = set()
+
+        while data := await reader.read(65536):
+            for event in connection.receive_data(data):
+                if isinstance(event, RequestReceived):
+                    requests[event.stream_id] = (dict(event.headers), bytearray())
+                elif isinstance(event, DataReceived):
+                    requests[event.stream_id][1].extend(event.data)
+                    connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, StreamEnded):
+                    self.stats[H2_STREAMS] += 1
+                    headers, body = requests.pop(event.stream_id)
+                    responder = asyncio.create_task(
+                        self.respond(connection, writer, event.stream_id, headers, bytes(body), window_open))
+                    responders.add(responder)
+                    responder.add_done_callback(responders.discard)
+                elif isinstance(event, WindowUpdated):
+                    window_open.set()
+            writer.write(connection.data_to_send())
+            await writer.drain()
+
+    async def respond(self, connection, writer: asyncio.StreamWriter, stream_id: int, headers: dict, body: bytes,
+                      window_open: asyncio.Event) -> None:
+        forwarded = {key: value for key, value in headers.items() if key in ('authorization', 'content-type')}
+        async with self.client.request(headers[':method'], self.upstream + headers[':path'],
+                                       headers=forwarded, data=body) as resp:
+            payload = await resp.read()
+            response_headers = [(':status', str(resp.status)),
+                                ('content-type', resp.headers.get('Content-Type', 'application/octet-stream')),
+                                ('content-length', str(len(payload)))]
+
+        connection.send_headers(stream_id, response_headers, end_stream=not payload)
+        offset = 0
+        while offset < len(payload):
+            window = min(connection.local_flow_control_window(stream_id), connection.max_outbound_frame_size)
+            if window <= 0:
+                window_open.clear()
+                await window_open.wait()
+                continue
+            chunk = payload[offset:offset + window]
+            offset += len(chunk)
+            connection.send_data(stream_id, chunk, end_stream=offset >= len(payload))
+            writer.write(connection.data_to_send())
+        writer.write(connection.data_to_send())
+
+
+def serve_front(port_queue, stats, cert: str, key: str, tasks_scale: int) -> None:
+    async def serve() -> None:
+        runner, upstream = await start_standin(tasks_scale=tasks_scale)
+        front = Front(upstream, stats)
+        front.client = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        context.set_alpn_protocols(['h2', 'http/1.1'])
+        server = await asyncio.start_server(front.handle, '127.0.0.1', 0, ssl=context)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+class TransportTapper(SimulatedTapper):
+    def __init__(self, session_name: str, port: int, transport: str, ssl_context: ssl.SSLContext):
+        super().__init__(session_name, '')
+        for attr, hostname in HOSTNAMES.items():
+            setattr(self, attr, f"https://{hostname}.{DOMAIN}:{port}")
+        self.transport = transport
+        self.ssl_context = ssl_context
+
+    def http_transport(self):
+        from bot.core.transport import create_transport
+
+        return create_transport(self.transport, resolver=LoopbackResolver(), ssl_context=self.ssl_context)
+
+    def http_connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(resolver=LoopbackResolver(), ssl=self.ssl_context)
+
+
+async def run_transport(transport: str, port: int, cert: str, sessions: int, duration: float) -> dict:
+    from bot.utils.metrics import metrics
+
+    ssl_context = ssl.create_default_context(cafile=cert)
+    tappers = [TransportTapper(f"{transport}-{i}", port, transport, ssl_context) for i in range(sessions)]
+    stop_at = monotonic() + duration
+    cycle_seconds = []
+    requests = errors = 0
+
+    async def session_loop(tapper: TransportTapper) -> None:
+        nonlocal requests, errors
+        while monotonic() < stop_at:
+            started = monotonic()
+            try:
+                requests += await simulate_cycle(tapper)
+                cycle_seconds.append(monotonic() - started)
+            except Exception:
+                errors += 1
+
+    coalesced_before = metrics.total('h2_coalesced_requests_total')
+    cpu_started = process_time()
+    wall_started = monotonic()
+    await asyncio.gather(*(session_loop(tapper) for tapper in tappers))
+    wall = monotonic() - wall_started
+    cpu = process_time() - cpu_started
+
+    cuts = quantiles(cycle_seconds, n=100) if len(cycle_seconds) > 1 else [0.0] * 99
+    return {'cycles': len(cycle_seconds), 'requests': requests, 'errors': errors, 'wall': wall, 'cpu': cpu,
+            'cycle_p50_ms': cuts[49] * 1000, 'cycle_p95_ms': cuts[94] * 1000,
+            'coalesced': metrics.total('h2_coalesced_requests_total') - coalesced_before}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare HTTP transports on full cycles against a local TLS front")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per transport")
+    parser.add_argument("--tasks-scale", type=int, default=1)
+    args = parser.parse_args()
+
+    from bot.core.transport import HTTP_TRANSPORTS, transport_available
+
+    quiet_logs()
+    cert, key = make_certificate(tempfile.mkdtemp(prefix='blum-front-'))
+    context = multiprocessing.get_context('spawn')
+    port_queue = context.Queue()
+    stats = context.Array('q', 4, lock=False)
+    front = context.Process(target=serve_front, args=(port_queue, stats, cert, key, args.tasks_scale), daemon=True)
+    front.start()
+    port = port_queue.get(timeout=30)
+
+    print(f"{args.sessions} sessions, {args.duration:.0f}s per transport, {len(HOSTNAMES)} hostnames on one front")
+    print(f"{'transport':>9} | {'cycles/s':>8} | {'cycle p50':>9} | {'cycle p95':>9} | {'conns/cycle':>11} | "
+          f"{'TLS/cycle':>9} | {'h2 streams':>10} | {'coalesced':>9} | {'CPU ms/cycle':>12} | errors")
+    try:
+        for transport in HTTP_TRANSPORTS:
+            if not transport_available(transport):
+                continue
+            stats[:] = [0, 0, 0, 0]
+            result = asyncio.run(run_transport(transport, port, cert, args.sessions, args.duration))
+            cycles = max(result['cycles'], 1)
+            print(f"{transport:>9} | {result['cycles'] / result['wall']:8.0f} | {result['cycle_p50_ms']:7.1f}ms | "
+                  f"{result['cycle_p95_ms']:7.1f}ms | {stats[CONNECTIONS] / cycles:11.2f} | "
+                  f"{stats[HANDSHAKES] / cycles:9.2f} | {stats[H2_STREAMS]:10} | {result['coalesced']:9.0f} | "
+                  f"{result['cpu'] * 1000 / cycles:12.2f} | {result['errors']}")
+    finally:
+        front.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import random
+import string
+
+TASK_STATUSES = ('NOT_STARTED', 'STARTED', 'READY_FOR_VERIFY', 'READY_FOR_CLAIM', 'FINISHED')
+TASK_TYPES = ('SOCIAL_SUBSCRIPTION', 'INTERNAL', 'PARTNER_INTEGRATION', 'PROGRESS_TARGET', 'ONCHAIN_TRANSACTION')
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return ' '.join(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(words))
+
+
+def make_task(rng: random.Random, sub_tasks: int = 0) -> dict:
+    task = {
+        'id': '%08x-%04x-%04x-%04x-%012x' % tuple(rng.getrandbits(bits) for bits in (32, 16, 16, 16, 48)),
+        'kind': 'QUEST',
+        'type': rng.choice(TASK_TYPES),
+        'status': rng.choice(TASK_STATUSES),
+        'validationType': rng.choice(('DEFAULT', 'KEYWORD')),
+        'iconFileKey': f"task.icon.{rng.randint(1, 500)}.png",
+        'bannerFileKey': None,
+        'title': _text(rng, 3).title(),
+        'productName': None,
+        'description': _text(rng, 25),
+        'reward': str(rng.choice((50, 100, 150, 300, 1000))),
+        'socialSubscription': {'openInTelegram': rng.random() < 0.5, 'url': f"https://t.me/{_text(rng, 1)}"},
+        'isHidden': False,
+        'isDisclaimerRequired': False,
+    }
+    if sub_tasks:
+        task['subTasks'] = [make_task(rng) for _ in range(sub_tasks)]
+    return task
+
+
+def make_tasks_payload(scale: int = 1, seed: int = 42) -> list:
+    """Response of GET /api/v1/tasks shaped like the real one; scale=1 is roughly today's size."""
+    rng = random.Random(seed)
+    return [
+        {'sectionType': 'HIGHLIGHTS',
+         'tasks': [make_task(rng, sub_tasks=rng.choice((0, 0, 3))) for _ in range(8 * scale)]},
+        {'sectionType': 'WEEKLY_ROUTINE',
+         'tasks': [make_task(rng, sub_tasks=4) for _ in range(2 * scale)]},
+        {'sectionType': 'DEFAULT',
+         'subSections': [{'title': _text(rng, 2).title(), 'tasks': [make_task(rng) for _ in range(12 * scale)]}
+                         for _ in range(5)]},
+    ]
@@ -0,0 +1,184 @@
+"""Local stand-in for the Blum API and a Tapper wired to it, for benchmarks and profiling."""
+import asyncio
+import base64
+import json
+import multiprocessing
+from contextlib import contextmanager
+from time import time, perf_counter
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from benchmarks.payloads import make_tasks_payload
+from bot.utils.logger import logger
+from bot.core.limiter import rate_limiter
+from bot.core.tapper import Tapper
+from bot.utils.metrics import metrics
+
+URL_ATTRS = ('gateway_url', 'game_url', 'wallet_url', 'subscription_url', 'tribe_url', 'user_url', 'earn_domain')
+
+
+def make_token(ttl: int = 3600) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': int(time()) + ttl}).encode()).decode().rstrip('=')
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload}.standin"
+
+
+def create_app(tasks_scale: int = 1) -> web.Application:
+    tasks_body = json.dumps(make_tasks_payload(scale=tasks_scale)).encode()
+
+    def now_ms() -> int:
+        return int(time() * 1000)
+
+    async def auth(request: web.Request) -> web.Response:
+        return web.json_response({'token': {'access': make_token(), 'refresh': make_token(86400)}})
+
+    async def refresh(request: web.Request) -> web.Response:
+        return web.json_response({'access': make_token(), 'refresh': make_token(86400)})
+
+    async def balance(request: web.Request) -> web.Response:
+        now = now_ms()
+        return web.json_response({
+            'availableBalance': '1234.56', 'playPasses': 3, 'isFastFarmingEnabled': True, 'timestamp': now,
+            'farming': {'startTime': now - 8 * 3600 * 1000, 'endTime': now - 1000,
+                        'earningsRate': '0.002', 'balance': '57.6'},
+        })
+
+    async def wallet(request: web.Request) -> web.Response:
+        return web.json_response({'points': [{'symbol': 'BP', 'balance': '1234.56'}]})
+
+    async def daily_reward(request: web.Request) -> web.Response:
+        return web.Response(text='OK')
+
+    async def friends_balance(request: web.Request) -> web.Response:
+        return web.json_response({'amountForClaim': '0', 'canClaim': False,
+                                  'canClaimAt': str(now_ms() + 8 * 3600 * 1000)})
+
+    async def friends_claim(request: web.Request) -> web.Response:
+        return web.json_response({'claimBalance': '0'})
+
+    async def tribe_my(request: web.Request) -> web.Response:
+        return web.json_response({'id': 'standin-tribe', 'title': 'Stand-in', 'chatname': 'standin'})
+
+    async def tribe_by_chatname(request: web.Request) -> web.Response:
+        return web.json_response({'id': 'standin-tribe', 'title': 'Stand-in',
+                                  'chatname': request.match_info['chatname']})
+
+    async def tasks(request: web.Request) -> web.Response:
+        return web.Response(body=tasks_body, content_type='application/json')
+
+    async def task_action(request: web.Request) -> web.Response:
+        return web.json_response({'id': request.match_info['task_id'], 'status': 'FINISHED'})
+
+    async def farming_claim(request: web.Request) -> web.Response:
+        return web.json_response({'availableBalance': '1292.16', 'playPasses': 3, 'timestamp': now_ms()})
+
+    async def farming_start(request: web.Request) -> web.Response:
+        now = now_ms()
+        return web.json_response({'startTime': now, 'endTime': now + 8 * 3600 * 1000,
+                                  'earningsRate': '0.002', 'balance': '0'})
+
+    app = web.Application()
+    app.router.add_post('/api/v1/auth/provider/PROVIDER_TELEGRAM_MINI_APP', auth)
+    app.router.add_post('/api/v1/auth/refresh', refresh)
+    app.router.add_get('/api/v1/user/balance', balance)
+    app.router.add_get('/api/v1/wallet/my/points/balance', wallet)
+    app.router.add_post('/api/v1/daily-reward', daily_reward)
+    app.router.add_get('/api/v1/friends/balance', friends_balance)
+    app.router.add_post('/api/v1/friends/claim', friends_claim)
+    app.router.add_get('/api/v1/tribe/my', tribe_my)
+    app.router.add_get('/api/v1/tribe/by-chatname/{chatname}', tribe_by_chatname)
+    app.router.add_get('/api/v1/tasks', tasks)
+    app.router.add_post('/api/v1/tasks/{task_id}/{action}', task_action)
+    app.router.add_post('/api/v1/farming/claim', farming_claim)
+    app.router.add_post('/api/v1/farming/start', farming_start)
+    return app
+
+
+async def start_standin(host: str = '127.0.0.1', port: int = 0, tasks_scale: int = 1) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(create_app(tasks_scale=tasks_scale), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}"
+
+
+def _serve(port_queue, tasks_scale: int) -> None:
+    async def serve() -> None:
+        runner, base_url = await start_standin(tasks_scale=tasks_scale)
+        port_queue.put(base_url)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def spawn_standin(tasks_scale: int = 1) -> tuple[multiprocessing.Process, str]:
+    """Runs the stand-in in its own process, so its CPU time does not pollute the measured one."""
+    context = multiprocessing.get_context('spawn')
+    port_queue = context.Queue()
+    process = context.Process(target=_serve, args=(port_queue, tasks_scale), daemon=True)
+    process.start()
+    return process, port_queue.get(timeout=30)
+
+
+class SimulatedTapper(Tapper):
+    def __init__(self, session_name: str, base_url: str):
+        super().__init__(tg_client=SimpleNamespace(name=session_name, proxy=None, is_connected=False), proxy=None)
+        # Endpoints are class-level on Tapper; the instance dict of this subclass shadows them
+        for attr in URL_ATTRS:
+            setattr(self, attr, base_url)
+        self.user_agent = 'Mozilla/5.0 (Linux; Android 12) Mobile Safari/537.36'
+        self.sec_ch_ua = '"Android WebView";v="120"'
+
+    def http_middlewares(self) -> list:
+        # The stand-in is there to be saturated; production rate limits would only measure themselves
+        return [middleware for middleware in super().http_middlewares() if middleware is not rate_limiter]
+
+    async def get_tg_web_data(self) -> str:
+        return f"query_id=standin&user=%7B%22id%22%3A1%7D&auth_date={int(time())}&hash=standin"
+
+
+@contextmanager
+def phase(tapper: Tapper, name: str):
+    tapper.phase = name
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe('phase_seconds', perf_counter() - started, phase=name)
+
+
+async def simulate_cycle(tapper: SimulatedTapper) -> int:
+    """One full wake-up through the real Tapper endpoint methods, without the pacing sleeps.
+
+    Returns the number of requests made.
+    """
+    tapper.open_http_client()
+    http_client = tapper.http_client
+    try:
+        with phase(tapper, 'login'):
+            access_token, refresh_token = await tapper.login(http_client=http_client,
+                                                             initdata=await tapper.get_tg_web_data())
+            http_client.headers['Authorization'] = f"Bearer {access_token}"
+        with phase(tapper, 'balance'):
+            await tapper.balance(http_client=http_client)
+            await tapper.wallet(http_client)
+        with phase(tapper, 'daily_reward'):
+            await tapper.claim_daily_reward(http_client=http_client)
+        with phase(tapper, 'friends'):
+            await tapper.friend_balance(http_client=http_client)
+        with phase(tapper, 'tribe'):
+            await tapper.my_tribe(http_client=http_client)
+        with phase(tapper, 'tasks'):
+            await tapper.get_tasks(http_client=http_client)
+        with phase(tapper, 'farming'):
+            await tapper.claim(http_client=http_client)
+            await tapper.start(http_client=http_client)
+        return 9
+    finally:
+        tapper.phase = 'sleep'
+        await tapper.close_http_client()
+
+
+def quiet_logs() -> None:
+    logger.remove()
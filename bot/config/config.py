@@ -21,6 +21,58 @@ class Settings(BaseSettings):
 
     USE_PROXY: bool = False
 
+    CONFIG_WATCH_INTERVAL: int = 5
+
+    WORKERS: int = 1
+
+    COORDINATION_DB: str = ''
+    NODE_ID: str = ''
+    LEASE_TTL: int = 60
+
+    JSON_BACKEND: str = 'auto'
+    EVENT_LOOP: str = 'asyncio'
+    HTTP_TRANSPORT: str = 'aiohttp'
+
+    DASHBOARD: bool = False
+    DASHBOARD_REFRESH: float = 1
+
+    METRICS_LOG_INTERVAL: int = 60
+
+    WATCHDOG: bool = False
+    WATCHDOG_THRESHOLD: float = 0.5
+
+    CASSETTE_DIR: str = ''
+
+    PROXY_CHECK_TTL: int = 86400
+    WARM_RESTART: bool = True
+    AUTH_PREFETCH_HORIZON: int = 300
+    AUTH_PREFETCH_RATE: float = 1
+
+    TG_GLOBAL_RATE: float = 5
+    TG_DC_RATE: float = 3
+
+    REQUEST_TIMEOUT: float = 30
+    ENDPOINT_TIMEOUTS: dict[str, float] = {'/api/v1/auth': 20, '/api/v1/tasks': 60}
+    CYCLE_DEADLINE: int = 3600
+
+    RATE_LIMITS: dict[str, list[float]] = {'user-domain.blum.codes': [5, 10], 'game-domain.blum.codes': [10, 20]}
+    DEFAULT_RATE_LIMIT: list[float] = [20, 40]
+
+    ADAPTIVE_CONCURRENCY: bool = True
+    CONCURRENCY_RANGE: list[int] = [2, 200]
+
+    PROXY_CONCURRENCY: int = 2
+    MAX_CONCURRENT_CYCLES: int = 0
+
+    DNS_CACHE: bool = True
+    DNS_TTL: int = 300
+
+    HTTP_CACHE: bool = True
+    CACHE_POLICIES: dict[str, tuple[float, bool]] = {
+        '/api/v1/tribe/by-chatname/': (3600, True),
+        '/api/v2/game/eligibility/dogs_drop': (600, False),
+    }
+
 
 settings = Settings()
 
@@ -0,0 +1,129 @@
+import asyncio
+import os
+
+from better_proxy import Proxy
+from pydantic import ValidationError
+
+from bot.config.config import Settings, settings
+from bot.utils.logger import logger
+from bot.utils.json_codec import codec
+
+ENV_FILE_PATH = '.env'
+PROXY_FILE_PATH = 'bot/config/proxies/session_proxy.json'
+
+
+def load_proxies(path: str = PROXY_FILE_PATH) -> dict[str, str]:
+    with open(path, 'rb') as f:
+        data = codec.loads(f.read())
+
+    if not isinstance(data, dict):
+        raise ValueError("expected an object mapping session names to proxies")
+
+    for session_name, proxy in data.items():
+        if not isinstance(proxy, str):
+            raise ValueError(f"proxy for '{session_name}' must be a string")
+        try:
+            Proxy.from_str(proxy)
+        except Exception as e:
+            raise ValueError(f"invalid proxy for '{session_name}': {e}")
+
+    return data
+
+
+class ConfigWatcher:
+    def __init__(self, env_file: str = ENV_FILE_PATH, proxy_file: str = PROXY_FILE_PATH):
+        self.env_file = env_file
+        self.proxy_file = proxy_file
+        self.proxies: dict[str, str] = {}
+        self.version = 0
+        self._mtimes = {}
+        self._waiters = set()
+
+    def start(self, proxies: dict[str, str]) -> None:
+        self.proxies = dict(proxies)
+        self._mtimes = {path: self._mtime(path) for path in (self.env_file, self.proxy_file)}
+
+    @staticmethod
+    def _mtime(path: str) -> float | None:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _changed(self, path: str) -> bool:
+        mtime = self._mtime(path)
+        if mtime == self._mtimes.get(path):
+            return False
+        self._mtimes[path] = mtime
+        return True
+
+    def reload_settings(self) -> list[str]:
+        try:
+            new_settings = Settings(_env_file=self.env_file)
+        except ValidationError as e:
+            logger.error(f"Invalid {self.env_file}, keeping current settings: {e}")
+            return []
+
+        changed = [name for name in Settings.model_fields
+                   if getattr(new_settings, name) != getattr(settings, name)]
+        for name in changed:
+            setattr(settings, name, getattr(new_settings, name))
+
+        return changed
+
+    def reload_proxies(self) -> list[str]:
+        try:
+            proxies = load_proxies(self.proxy_file)
+        except FileNotFoundError:
+            logger.error(f"{self.proxy_file} not found, keeping current proxy bindings")
+            return []
+        except ValueError as e:
+            logger.error(f"Invalid {self.proxy_file}, keeping current proxy bindings: {e}")
+            return []
+
+        changed = [name for name in proxies.keys() | self.proxies.keys()
+                   if proxies.get(name) != self.proxies.get(name)]
+        self.proxies = proxies
+
+        return changed
+
+    def check(self) -> bool:
+        changed_settings = self.reload_settings() if self._changed(self.env_file) else []
+        changed_proxies = self.reload_proxies() if self._changed(self.proxy_file) else []
+
+        if not changed_settings and not changed_proxies:
+            return False
+
+        if changed_settings:
+            logger.info(f"Settings reloaded: <ly>{', '.join(changed_settings)}</ly>")
+        if changed_proxies:
+            logger.info(f"Proxy bindings reloaded for <ly>{len(changed_proxies)}</ly> sessions")
+
+        self.version += 1
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+        return True
+
+    async def wait(self, timeout: float) -> bool:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+    async def watch(self) -> None:
+        while settings.CONFIG_WATCH_INTERVAL > 0:
+            await asyncio.sleep(settings.CONFIG_WATCH_INTERVAL)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error while reloading configuration: {e}")
+
+
+config_watcher = ConfigWatcher()
@@ -0,0 +1,73 @@
+from bot.core.dispatcher import proxy_key
+from bot.core.http import Middleware, endpoint_of
+from bot.utils.metrics import metrics
+
+# Status line and the blank line closing the headers
+HEAD_OVERHEAD = 14
+
+# Bytes sent and received per session, only for the per-cycle log line; metrics stay per proxy and endpoint
+traffic: dict[str, list[int]] = {}
+
+
+def head_bytes(headers) -> int:
+    return HEAD_OVERHEAD + sum(len(key) + len(value) + 4 for key, value in headers)
+
+
+def request_bytes(resp) -> int:
+    info = resp.request_info
+    head = head_bytes(info.headers.items()) + len(info.method) + len(info.url.raw_path_qs)
+    return head + int(info.headers.get('Content-Length') or 0)
+
+
+def body_bytes(resp) -> int:
+    # Content-Length is the size on the wire; without it only the decoded size is known, an upper bound
+    length = resp.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        return int(length)
+    total_bytes = getattr(resp.content, 'total_bytes', None)
+    if total_bytes is None:
+        return resp.content_length or 0
+    return total_bytes
+
+
+class BandwidthMiddleware(Middleware):
+    """Counts the bytes each request sends and receives, per proxy and per endpoint."""
+
+    def __init__(self, session_name: str, proxy: str | None):
+        self.session_name = session_name
+        self.proxy = proxy_key(proxy)
+
+    def count(self, direction: str, size: int, endpoint: str) -> None:
+        metrics.inc('proxy_bytes_total', size, proxy=self.proxy, direction=direction)
+        metrics.inc('endpoint_bytes_total', size, endpoint=endpoint, direction=direction)
+        traffic.setdefault(self.session_name, [0, 0])[direction == 'received'] += size
+
+    def count_received(self, resp, endpoint: str) -> None:
+        wire_bytes = getattr(resp, 'wire_bytes', None)
+        if wire_bytes is not None:
+            self.count('received', wire_bytes, endpoint)
+            return
+        raw_headers = getattr(resp, 'raw_headers', None)
+        head = head_bytes(raw_headers) if raw_headers else 0
+        self.count('received', head + body_bytes(resp), endpoint)
+
+    async def __call__(self, handler, method: str, url, **kwargs):
+        resp = await handler(method, url, **kwargs)
+        endpoint = endpoint_of(url)
+        self.count('sent', request_bytes(resp), endpoint)
+        metrics.inc('response_encodings_total', endpoint=endpoint,
+                    encoding=resp.headers.get('Content-Encoding', 'identity'))
+
+        connection = getattr(resp, 'connection', None)
+        if connection is None:
+            # Already read in full, or not a live response at all
+            self.count_received(resp, endpoint)
+        else:
+            # Chunked bodies are only known once read, which is when the connection goes back to the pool
+            connection.add_callback(lambda: self.count_received(resp, endpoint))
+        return resp
+
+
+def session_traffic(session_name: str) -> tuple[int, int]:
+    sent, received = traffic.get(session_name, (0, 0))
+    return sent, received
@@ -0,0 +1,116 @@
+import asyncio
+from time import monotonic
+from typing import NamedTuple
+
+from yarl import URL
+
+from bot.config import settings
+from bot.core.cassette import ReplayResponse
+from bot.core.http import Middleware
+from bot.utils.metrics import metrics
+
+CACHEABLE_METHODS = frozenset(['GET', 'HEAD'])
+MAX_ENTRIES = 10000
+
+
+class CachePolicy(NamedTuple):
+    prefix: str
+    ttl: float
+    shared: bool
+
+
+class CachedBody(NamedTuple):
+    expires_at: float
+    status: int
+    content_type: str
+    body: bytes
+
+
+def policy_for(path: str) -> CachePolicy | None:
+    matched = None
+    for prefix, (ttl, shared) in settings.CACHE_POLICIES.items():
+        if path.startswith(prefix) and (matched is None or len(prefix) > len(matched.prefix)):
+            matched = CachePolicy(prefix, ttl, shared)
+    return matched
+
+
+class ResponseCache:
+    """Process-wide store behind every session's CachingMiddleware.
+
+    Keys of personal endpoints carry the session name, shared ones are served to every session.
+    """
+
+    def __init__(self):
+        self.entries: dict[tuple, CachedBody] = {}
+        self.inflight: dict[tuple, asyncio.Future] = {}
+
+    def get(self, key: tuple) -> CachedBody | None:
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at <= monotonic():
+            del self.entries[key]
+            return None
+        return entry
+
+    def put(self, key: tuple, entry: CachedBody) -> None:
+        if len(self.entries) >= MAX_ENTRIES:
+            now = monotonic()
+            for stale in [stale for stale, cached in self.entries.items() if cached.expires_at <= now]:
+                del self.entries[stale]
+            # Still full of live entries: drop the oldest ones
+            while len(self.entries) >= MAX_ENTRIES:
+                del self.entries[next(iter(self.entries))]
+        self.entries[key] = entry
+
+
+response_cache = ResponseCache()
+
+
+class CachingMiddleware(Middleware):
+    """Serves GETs covered by CACHE_POLICIES from the shared cache and coalesces identical requests in flight."""
+
+    def __init__(self, session_name: str):
+        self.session_name = session_name
+
+    async def __call__(self, handler, method: str, url, **kwargs):
+        method = method.upper()
+        parsed = URL(url)
+        policy = policy_for(parsed.path) if settings.HTTP_CACHE and method in CACHEABLE_METHODS else None
+        if policy is None:
+            return await handler(method, url, **kwargs)
+
+        key = (method, str(parsed), None if policy.shared else self.session_name)
+        cached = response_cache.get(key)
+        if cached is not None:
+            metrics.inc('http_cache_hits_total', endpoint=policy.prefix)
+            return ReplayResponse(method, parsed, cached.status, cached.content_type, cached.body)
+
+        leader = response_cache.inflight.get(key)
+        if leader is not None:
+            metrics.inc('http_cache_coalesced_total', endpoint=policy.prefix)
+            shared = await asyncio.shield(leader)
+            if shared is not None:
+                return ReplayResponse(method, parsed, shared.status, shared.content_type, shared.body)
+            # The leader was cancelled before it got an answer
+            return await self(handler, method, url, **kwargs)
+
+        metrics.inc('http_cache_misses_total', endpoint=policy.prefix)
+        future = response_cache.inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            resp = await handler(method, url, **kwargs)
+            body = await resp.read()
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Retrieved here so an error nobody else waited for is not reported as never retrieved
+            future.exception()
+            raise
+        finally:
+            del response_cache.inflight[key]
+
+        entry = CachedBody(monotonic() + policy.ttl, resp.status, resp.headers.get('Content-Type', ''), body)
+        if policy.ttl > 0 and 200 <= resp.status < 300:
+            response_cache.put(key, entry)
+        future.set_result(entry)
+        return ReplayResponse(method, parsed, entry.status, entry.content_type, entry.body)
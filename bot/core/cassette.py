@@ -0,0 +1,197 @@
+import asyncio
+import base64
+import gzip
+import os
+import re
+from collections import deque
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from bot.core.http import Middleware
+from bot.utils.json_codec import codec
+from bot.utils.logger import logger
+
+# Identity and credentials; anything JWT-shaped is scrubbed wherever it appears
+SCRUBBED_KEYS = frozenset(['query', 'ip', 'access', 'refresh', 'username', 'firstName', 'lastName', 'referralToken'])
+JWT_PATTERN = re.compile(r'eyJ[\w-]+\.([\w-]+)\.[\w-]+')
+SCRUBBED = 'scrubbed'
+
+
+def scrub_token(match: re.Match) -> str:
+    # Keep the expiry so replayed logins age like the recorded ones
+    try:
+        payload = match.group(1) + '=' * (-len(match.group(1)) % 4)
+        exp = codec.loads(base64.urlsafe_b64decode(payload)).get('exp', 0)
+    except Exception:
+        exp = 0
+    payload = base64.urlsafe_b64encode(codec.dumps({'exp': exp}).encode()).decode().rstrip('=')
+    return f"eyJhbGciOiJub25lIn0.{payload}.{SCRUBBED}"
+
+
+def scrub(value):
+    if isinstance(value, dict):
+        return {key: scrub_value(key, item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    if isinstance(value, str):
+        return JWT_PATTERN.sub(scrub_token, value)
+    return value
+
+
+def scrub_value(key: str, value):
+    if key in SCRUBBED_KEYS and isinstance(value, str):
+        match = JWT_PATTERN.fullmatch(value)
+        return scrub_token(match) if match else SCRUBBED
+    return scrub(value)
+
+
+def scrub_body(body: bytes, content_type: str) -> dict:
+    try:
+        text = body.decode()
+    except UnicodeDecodeError:
+        return {'body_b64': base64.b64encode(body).decode()}
+
+    if 'json' in content_type and text.strip():
+        try:
+            return {'body': codec.dumps(scrub(codec.loads(text)))}
+        except ValueError:
+            pass
+    return {'body': JWT_PATTERN.sub(scrub_token, text)}
+
+
+class CassetteRecorder(Middleware):
+    """Records sanitized request/response pairs to a gzipped JSON lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = []
+
+    async def __call__(self, handler, method: str, url, **kwargs):
+        resp = await handler(method, url, **kwargs)
+        body = await resp.read()
+        content_type = resp.headers.get('Content-Type', '')
+
+        self.entries.append({
+            'method': method.upper(),
+            'url': URL(url).path_qs,
+            'request': scrub(kwargs.get('json')),
+            'status': resp.status,
+            'content_type': content_type,
+            **scrub_body(body, content_type),
+        })
+        # The live body has been drained, callers get the same answer served from the bytes read here
+        replay = ReplayResponse(method.upper(), resp.url, resp.status, content_type, body)
+        replay.headers = resp.headers
+        return replay
+
+    def write(self, entries: list) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Every flush appends a gzip member; readers see the concatenation as one stream
+        with gzip.open(self.path, 'at', encoding='utf-8') as cassette:
+            for entry in entries:
+                cassette.write(codec.dumps(entry) + '\n')
+
+    async def close(self) -> None:
+        if not self.entries:
+            return
+        entries, self.entries = self.entries, []
+        try:
+            await asyncio.to_thread(self.write, entries)
+        except Exception as e:
+            logger.error(f"Error writing cassette {self.path}: {e}")
+
+
+def load_cassette(path: str) -> list[dict]:
+    with gzip.open(path, 'rt', encoding='utf-8') as cassette:
+        return [codec.loads(line) for line in cassette if line.strip()]
+
+
+class ReplayContent:
+    __slots__ = ('_body', '_offset')
+
+    def __init__(self, body: bytes):
+        self._body = body
+        self._offset = 0
+
+    async def read(self, n: int = -1) -> bytes:
+        end = len(self._body) if n < 0 else self._offset + n
+        chunk = self._body[self._offset:end]
+        self._offset += len(chunk)
+        return chunk
+
+
+class ReplayResponse:
+    __slots__ = ('method', 'url', 'status', 'headers', 'content', '_body')
+
+    def __init__(self, method: str, url: URL, status: int, content_type: str, body: bytes):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict({'Content-Type': content_type} if content_type else {}))
+        self.content = ReplayContent(body)
+        self._body = body
+
+    @property
+    def content_length(self) -> int:
+        return len(self._body)
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def request_info(self) -> aiohttp.RequestInfo:
+        return aiohttp.RequestInfo(self.url, self.method, CIMultiDictProxy(CIMultiDict()), self.url)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+        return self._body.decode(encoding, errors)
+
+    async def json(self, **kwargs):
+        return codec.loads(self._body) if self._body.strip() else None
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(self.request_info, (), status=self.status, headers=self.headers)
+
+    def release(self) -> None:
+        pass
+
+    async def wait_for_close(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+
+class CassetteReplayer(Middleware):
+    """Serves recorded responses without touching the network.
+
+    Responses for the same method and path are served in recorded order, starting over when exhausted.
+    """
+
+    def __init__(self, entries: list[dict]):
+        self.responses: dict[tuple[str, str], deque] = {}
+        for entry in entries:
+            body = (base64.b64decode(entry['body_b64']) if 'body_b64' in entry
+                    else entry.get('body', '').encode())
+            self.responses.setdefault((entry['method'], entry['url']), deque()).append(
+                (entry['status'], entry.get('content_type', ''), body))
+
+    async def __call__(self, handler, method: str, url, **kwargs):
+        url = URL(url)
+        method = method.upper()
+        recorded = self.responses.get((method, url.path_qs))
+        if not recorded:
+            return ReplayResponse(method, url, 404, '', b'')
+
+        status, content_type, body = recorded[0]
+        recorded.rotate(-1)
+        return ReplayResponse(method, url, status, content_type, body)
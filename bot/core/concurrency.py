@@ -0,0 +1,127 @@
+import asyncio
+from collections import deque
+from time import monotonic
+
+import aiohttp
+from yarl import URL
+
+from bot.config import settings
+from bot.core.http import Middleware
+from bot.exceptions import DeadlineExceeded
+from bot.utils.metrics import metrics
+
+ADAPTIVE_DOMAIN = '.blum.codes'
+INITIAL_LIMIT = 10
+BACKOFF = 0.5
+# A response counts as healthy while it is no slower than this multiple of the best recent latency
+LATENCY_TOLERANCE = 2.0
+# The latency floor creeps up per sample, so it follows the upstream when it gets slower for good
+FLOOR_DRIFT = 1.001
+MIN_CUT_INTERVAL = 1.0
+
+# Connect failures and connect timeouts belong to the session's proxy or network, not to the shared upstream
+NOT_UPSTREAM = (DeadlineExceeded, aiohttp.ConnectionTimeoutError, aiohttp.ClientConnectorError)
+
+
+class HostConcurrency:
+    __slots__ = ('host', 'limit', 'in_flight', 'waiters', 'latency_floor', 'last_cut')
+
+    def __init__(self, host: str, limit: float):
+        self.host = host
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.latency_floor = float('inf')
+        self.last_cut = 0.0
+
+
+class AdaptiveConcurrency(Middleware):
+    """AIMD limit on in-flight requests per Blum host.
+
+    Healthy responses raise the limit by about one per round of requests, 5xx and timeouts halve it.
+    """
+
+    def __init__(self):
+        self.hosts: dict[str, HostConcurrency] = {}
+
+    def state(self, host: str | None) -> HostConcurrency | None:
+        if not settings.ADAPTIVE_CONCURRENCY or not host or not host.endswith(ADAPTIVE_DOMAIN):
+            return None
+
+        state = self.hosts.get(host)
+        if state is None:
+            low, high = settings.CONCURRENCY_RANGE
+            state = self.hosts[host] = HostConcurrency(host, min(max(INITIAL_LIMIT, low), high))
+        return state
+
+    def wake(self, state: HostConcurrency) -> None:
+        while state.waiters and state.in_flight < int(state.limit):
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                state.in_flight += 1
+                waiter.set_result(None)
+        metrics.set('concurrency_in_flight', state.in_flight, host=state.host)
+
+    async def acquire(self, state: HostConcurrency) -> None:
+        if state.in_flight < int(state.limit) and not state.waiters:
+            state.in_flight += 1
+            metrics.set('concurrency_in_flight', state.in_flight, host=state.host)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        started = monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we got cancelled
+                self.release(state)
+            raise
+        finally:
+            metrics.observe('concurrency_wait_seconds', monotonic() - started, host=state.host)
+
+    def release(self, state: HostConcurrency) -> None:
+        state.in_flight -= 1
+        self.wake(state)
+
+    def record(self, state: HostConcurrency, latency: float, failed: bool) -> None:
+        low, high = settings.CONCURRENCY_RANGE
+        if failed:
+            now = monotonic()
+            # One cut per burst of failures: requests already in flight fail together
+            if now - state.last_cut >= MIN_CUT_INTERVAL:
+                state.limit = max(low, state.limit * BACKOFF)
+                state.last_cut = now
+                metrics.inc('concurrency_decreases_total', host=state.host)
+        else:
+            state.latency_floor = min(latency, state.latency_floor * FLOOR_DRIFT)
+            if latency <= state.latency_floor * LATENCY_TOLERANCE:
+                state.limit = min(high, state.limit + 1 / state.limit)
+        metrics.set('concurrency_limit', state.limit, host=state.host)
+
+    async def __call__(self, handler, method: str, url, **kwargs):
+        state = self.state(URL(url).host)
+        if state is None:
+            return await handler(method, url, **kwargs)
+
+        await self.acquire(state)
+        started = monotonic()
+        # None when the request tells nothing about the upstream, e.g. it was never sent
+        failed = None
+        try:
+            resp = await handler(method, url, **kwargs)
+            failed = resp.status >= 500 or resp.status == 429
+            return resp
+        except NOT_UPSTREAM:
+            raise
+        except asyncio.TimeoutError:
+            failed = True
+            raise
+        finally:
+            if failed is not None:
+                self.record(state, monotonic() - started, failed)
+            self.release(state)
+
+
+adaptive_concurrency = AdaptiveConcurrency()
@@ -0,0 +1,60 @@
+import asyncio
+from contextvars import ContextVar
+from time import monotonic
+
+import aiohttp
+from yarl import URL
+
+from bot.config import settings
+from bot.core.http import Middleware, endpoint_of
+from bot.exceptions import DeadlineExceeded
+from bot.utils.metrics import metrics
+
+# Monotonic time the current cycle must finish by, None when unbounded
+cycle_deadline: ContextVar[float | None] = ContextVar('cycle_deadline', default=None)
+
+
+def remaining() -> float | None:
+    deadline = cycle_deadline.get()
+    return None if deadline is None else deadline - monotonic()
+
+
+def endpoint_timeout(path: str) -> float:
+    matched = ''
+    timeout = settings.REQUEST_TIMEOUT
+    for prefix, prefix_timeout in settings.ENDPOINT_TIMEOUTS.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, timeout = prefix, prefix_timeout
+    return timeout
+
+
+class TimeoutMiddleware(Middleware):
+    """Bounds each request by its endpoint's timeout and by what is left of the cycle deadline."""
+
+    async def __call__(self, handler, method: str, url, **kwargs):
+        parsed = URL(url)
+        timeout = kwargs.get('timeout')
+        total = timeout.total if isinstance(timeout, aiohttp.ClientTimeout) and timeout.total else \
+            endpoint_timeout(parsed.path)
+
+        left = remaining()
+        clipped = False
+        if left is not None:
+            if left <= 0:
+                metrics.inc('cycle_deadline_exceeded_total')
+                raise DeadlineExceeded(f"cycle deadline passed before {method} {parsed.path}")
+            clipped = left < total
+            total = min(total, left)
+
+        kwargs['timeout'] = aiohttp.ClientTimeout(total=total)
+        try:
+            return await handler(method, url, **kwargs)
+        except DeadlineExceeded:
+            raise
+        except asyncio.TimeoutError as error:
+            if clipped:
+                # Cut short by the cycle deadline, not by a slow upstream
+                metrics.inc('cycle_deadline_exceeded_total')
+                raise DeadlineExceeded(f"cycle deadline passed during {method} {parsed.path}") from error
+            metrics.inc('request_timeouts_total', host=parsed.host, endpoint=endpoint_of(parsed))
+            raise
@@ -0,0 +1,159 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from time import monotonic
+
+from yarl import URL
+
+from bot.config import settings
+from bot.utils.metrics import metrics
+
+DIRECT = 'direct'
+
+
+def proxy_key(proxy: str | None) -> str:
+    # Credentials stay out of the key, it ends up in logs and metric labels
+    if not proxy:
+        return DIRECT
+    url = URL(proxy)
+    return f"{url.host}:{url.port}" if url.host else proxy
+
+
+class Slot:
+    __slots__ = ('key', 'priority', 'held')
+
+    def __init__(self, key: str, priority: int):
+        self.key = key
+        self.priority = priority
+        self.held = False
+
+
+# The slot the running phase holds, so a pause anywhere below it can hand the slot on while it waits
+current_slot: ContextVar[Slot | None] = ContextVar('current_slot', default=None)
+
+
+class CycleDispatcher:
+    """Hands out work slots, at most PROXY_CONCURRENCY per proxy and MAX_CONCURRENT_CYCLES overall.
+
+    Waiters are queued per priority and proxy. A free slot goes to the most urgent priority that can use it,
+    and within a priority round-robin across the proxies with due work.
+    """
+
+    def __init__(self):
+        self.queues: dict[tuple[int, str], deque[asyncio.Future]] = {}
+        self.active: dict[str, int] = {}
+        # Per priority, proxies with queued work in the order they get their next slot
+        self.rings: dict[int, deque[str]] = {}
+        self.running = 0
+
+    @staticmethod
+    def proxy_limit(key: str) -> float:
+        # Sessions without a proxy share nothing but the host's own connection, the global cap covers them
+        if key == DIRECT or settings.PROXY_CONCURRENCY <= 0:
+            return float('inf')
+        return settings.PROXY_CONCURRENCY
+
+    @staticmethod
+    def global_limit() -> float:
+        return settings.MAX_CONCURRENT_CYCLES if settings.MAX_CONCURRENT_CYCLES > 0 else float('inf')
+
+    def grant(self, key: str) -> None:
+        self.active[key] = self.active.get(key, 0) + 1
+        self.running += 1
+        metrics.set('dispatcher_active', self.active[key], proxy=key)
+
+    def pump(self) -> None:
+        global_limit = self.global_limit()
+        for priority in sorted(self.rings):
+            ring = self.rings[priority]
+            skipped = 0
+            while ring and self.running < global_limit and skipped < len(ring):
+                key = ring.popleft()
+                queue = self.queues[priority, key]
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    del self.queues[priority, key]
+                    continue
+
+                if self.active.get(key, 0) >= self.proxy_limit(key):
+                    ring.append(key)
+                    skipped += 1
+                    continue
+
+                self.grant(key)
+                queue.popleft().set_result(None)
+                skipped = 0
+                if queue:
+                    ring.append(key)
+                else:
+                    del self.queues[priority, key]
+                metrics.set('dispatcher_queued', len(queue), proxy=key, priority=priority)
+
+            if not ring:
+                del self.rings[priority]
+
+    async def acquire(self, key: str, priority: int = 0) -> None:
+        if not self.rings and self.active.get(key, 0) < self.proxy_limit(key) and self.running < self.global_limit():
+            self.grant(key)
+            metrics.observe('dispatcher_wait_seconds', 0.0, priority=priority)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self.queues.get((priority, key))
+        if queue is None:
+            queue = self.queues[priority, key] = deque()
+            self.rings.setdefault(priority, deque()).append(key)
+        queue.append(waiter)
+        metrics.set('dispatcher_queued', len(queue), proxy=key, priority=priority)
+        started = monotonic()
+        self.pump()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(key)
+            else:
+                self.pump()
+            raise
+        finally:
+            metrics.observe('dispatcher_wait_seconds', monotonic() - started, priority=priority)
+
+    def release(self, key: str) -> None:
+        self.active[key] -= 1
+        self.running -= 1
+        metrics.set('dispatcher_active', self.active[key], proxy=key)
+        if not self.active[key]:
+            del self.active[key]
+        self.pump()
+
+    @asynccontextmanager
+    async def slot(self, proxy: str | None, priority: int = 0):
+        slot = Slot(proxy_key(proxy), priority)
+        await self.acquire(slot.key, priority)
+        slot.held = True
+        token = current_slot.set(slot)
+        try:
+            yield
+        finally:
+            current_slot.reset(token)
+            if slot.held:
+                self.release(slot.key)
+
+    async def pause(self, delay: float) -> None:
+        slot = current_slot.get()
+        if slot is None or not slot.held:
+            await asyncio.sleep(delay)
+            return
+
+        # Nobody should wait for a slot that only sleeps
+        slot.held = False
+        self.release(slot.key)
+        # A cancelled sleep leaves the slot released; queueing for it again would hold the cancellation back
+        await asyncio.sleep(delay)
+        await self.acquire(slot.key, slot.priority)
+        slot.held = True
+
+
+dispatcher = CycleDispatcher()
@@ -0,0 +1,84 @@
+import asyncio
+from array import array
+from time import monotonic
+
+from yarl import URL
+
+from bot.core.http import Middleware
+
+HOST_WINDOW = 4096
+
+
+class RingBuffer:
+    """Last `capacity` samples as a timestamp and a value, in two flat arrays overwritten in place."""
+
+    __slots__ = ('times', 'values', 'cursor')
+
+    def __init__(self, capacity: int):
+        self.times = array('d', [float('-inf')]) * capacity
+        self.values = array('d', [0.0]) * capacity
+        self.cursor = 0
+
+    def add(self, value: float, now: float) -> None:
+        index = self.cursor % len(self.times)
+        self.times[index] = now
+        self.values[index] = value
+        self.cursor += 1
+
+    def window(self, seconds: float, now: float) -> tuple[int, float, float]:
+        """Count and sum of the samples in the last `seconds`, and how many seconds they cover."""
+        since = now - seconds
+        count, total, oldest = 0, 0.0, now
+        for at, value in zip(self.times, self.values):
+            if at > since:
+                count += 1
+                total += value
+                oldest = min(oldest, at)
+        # A full buffer no longer reaches back the whole window, the samples it holds cover less time
+        return count, total, (now - oldest if count == len(self.times) else seconds)
+
+
+class FleetStats:
+    """What the dashboard shows, collected as it happens instead of being parsed back out of the log."""
+
+    def __init__(self):
+        self.tappers: dict[str, object] = {}
+        self.quarantined: set[str] = set()
+        # Per host, one sample per request: 1 if it failed, 0 if not
+        self.hosts: dict[str, RingBuffer] = {}
+        self.cycle_seconds: dict[str, float] = {}
+
+    def register(self, tapper) -> None:
+        self.tappers[tapper.session_name] = tapper
+        self.quarantined.discard(tapper.session_name)
+
+    def unregister(self, session_name: str, quarantined: bool = False) -> None:
+        self.tappers.pop(session_name, None)
+        if quarantined:
+            self.quarantined.add(session_name)
+
+    def record_request(self, host: str, failed: bool) -> None:
+        buffer = self.hosts.get(host)
+        if buffer is None:
+            buffer = self.hosts[host] = RingBuffer(HOST_WINDOW)
+        buffer.add(failed, monotonic())
+
+    def record_cycle(self, session_name: str, seconds: float) -> None:
+        self.cycle_seconds[session_name] = seconds
+
+
+fleet = FleetStats()
+
+
+class FleetMiddleware(Middleware):
+    async def __call__(self, handler, method: str, url, **kwargs):
+        host = URL(url).host
+        try:
+            resp = await handler(method, url, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            fleet.record_request(host, True)
+            raise
+        fleet.record_request(host, resp.status >= 500 or resp.status == 429)
+        return resp
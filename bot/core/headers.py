@@ -1,6 +1,7 @@
-headers = {
+from types import MappingProxyType
+
+headers = MappingProxyType({
     'Accept': 'application/json, text/plain, */*',
-    'Accept-Encoding': 'gzip, deflate, br, zstd',
     'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
     'Connection': 'keep-alive',
     'Content-Type': 'application/json',
@@ -11,4 +12,4 @@ headers = {
     'Sec-Ch-Ua-Mobile': '?1',
     'Sec-Ch-Ua-Platform': 'Android',
     'X-Requested-With': 'org.telegram.messenger.web',
-}
+})
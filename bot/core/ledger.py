@@ -0,0 +1,148 @@
+import os
+from datetime import datetime, timedelta, timezone
+from time import time
+
+import aiofiles
+
+from bot.config import settings
+from bot.utils.logger import logger
+from bot.utils.json_codec import codec
+
+LEDGER_DIR = 'ledger'
+
+# daily-reward is claimed with offset=-180, so the reward day rolls over at UTC+3
+DAILY_REWARD_TZ = timezone(timedelta(minutes=180))
+
+# Fallback windows for actions whose responses carry no expiry of their own
+FRIENDS_RECHECK = 8 * 3600
+TRIBE_RECHECK = 24 * 3600
+TASKS_RECHECK = 6 * 3600
+
+# Lower goes first, both within a cycle and for dispatcher slots: claims whose window is closing,
+# then the daily and friend claims, then work that can wait, and logins ahead of a cycle last
+PHASE_PRIORITY = {
+    'login': 0, 'balance': 0, 'farming': 0,
+    'daily_reward': 1, 'friends': 1,
+    'tasks': 2, 'tribe': 2, 'games': 2,
+    'prefetch': 3,
+}
+
+
+class Ledger:
+    __slots__ = ('session_name', 'path', 'server_offset', 'daily_reward_date', 'friends_claim_at',
+                 'tribe_checked_at', 'tasks_checked_at', 'finished_tasks', 'pending_tasks', 'farming_end',
+                 'proxy_check')
+
+    def __init__(self, session_name: str):
+        self.session_name = session_name
+        self.path = os.path.join(LEDGER_DIR, f"{session_name}.json")
+
+        self.server_offset = 0.0
+        self.daily_reward_date = None
+        self.friends_claim_at = None
+        self.tribe_checked_at = None
+        self.tasks_checked_at = None
+        self.finished_tasks = set()
+        self.pending_tasks = set()
+        # None - unknown, 0 - farming is not started, otherwise the server timestamp it ends at
+        self.farming_end = None
+        # Last successful proxy check: proxy host:port, when, and what ipinfo.io said
+        self.proxy_check = None
+
+    def server_time(self) -> float:
+        return time() + self.server_offset
+
+    def sync_clock(self, server_timestamp: int) -> None:
+        self.server_offset = server_timestamp - time()
+
+    def server_date(self) -> str:
+        return datetime.fromtimestamp(self.server_time(), DAILY_REWARD_TZ).date().isoformat()
+
+    def daily_reward_due(self) -> bool:
+        return self.daily_reward_date != self.server_date()
+
+    def friends_due(self) -> bool:
+        return self.friends_claim_at is None or self.server_time() >= self.friends_claim_at
+
+    def tribe_due(self) -> bool:
+        return self.tribe_checked_at is None or self.server_time() - self.tribe_checked_at >= TRIBE_RECHECK
+
+    def tasks_due(self) -> bool:
+        if self.pending_tasks or self.tasks_checked_at is None:
+            return True
+        return self.server_time() - self.tasks_checked_at >= TASKS_RECHECK
+
+    def farming_due(self) -> bool:
+        return self.farming_end is None or self.server_time() >= self.farming_end
+
+    def to_dict(self) -> dict:
+        return {
+            'session_name': self.session_name,
+            'server_offset': self.server_offset,
+            'daily_reward_date': self.daily_reward_date,
+            'friends_claim_at': self.friends_claim_at,
+            'tribe_checked_at': self.tribe_checked_at,
+            'tasks_checked_at': self.tasks_checked_at,
+            'finished_tasks': sorted(self.finished_tasks),
+            'pending_tasks': sorted(self.pending_tasks),
+            'farming_end': self.farming_end,
+            'proxy_check': self.proxy_check,
+        }
+
+    async def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            async with aiofiles.open(self.path, 'r') as ledger_file:
+                data = codec.loads(await ledger_file.read())
+        except Exception as e:
+            logger.warning(f"{self.session_name} | Ignoring unreadable ledger {self.path}: {e}")
+            return
+
+        if data.get('session_name') != self.session_name:
+            logger.warning(f"{self.session_name} | Session name mismatch in ledger {self.path}")
+            return
+
+        self.server_offset = data.get('server_offset', 0.0)
+        self.daily_reward_date = data.get('daily_reward_date')
+        self.friends_claim_at = data.get('friends_claim_at')
+        self.tribe_checked_at = data.get('tribe_checked_at')
+        self.tasks_checked_at = data.get('tasks_checked_at')
+        self.finished_tasks = set(data.get('finished_tasks', []))
+        self.pending_tasks = set(data.get('pending_tasks', []))
+        self.farming_end = data.get('farming_end')
+        self.proxy_check = data.get('proxy_check')
+
+    async def save(self) -> None:
+        try:
+            os.makedirs(LEDGER_DIR, exist_ok=True)
+            async with aiofiles.open(self.path, 'w') as ledger_file:
+                await ledger_file.write(codec.dumps(self.to_dict()))
+        except Exception as e:
+            logger.error(f"{self.session_name} | Error saving ledger: {e}")
+
+
+def plan_cycle(ledger: Ledger, first_cycle: bool) -> list[str]:
+    phases = []
+
+    if first_cycle or settings.PLAY_GAMES or ledger.farming_end is None:
+        phases.append('balance')
+    if ledger.daily_reward_due():
+        phases.append('daily_reward')
+    if ledger.friends_due():
+        phases.append('friends')
+    if settings.PLAY_GAMES:
+        phases.append('games')
+    if ledger.tribe_due():
+        phases.append('tribe')
+    if settings.TASKS and ledger.tasks_due():
+        phases.append('tasks')
+    if ledger.farming_due():
+        phases.append('farming')
+
+    if phases:
+        phases.sort(key=PHASE_PRIORITY.__getitem__)
+        phases.insert(0, 'login')
+
+    return phases
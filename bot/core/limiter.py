@@ -0,0 +1,83 @@
+import asyncio
+from time import monotonic
+
+from yarl import URL
+
+from bot.config import settings
+from bot.core.http import Middleware
+from bot.utils.metrics import metrics
+
+
+class TokenBucket:
+    """Token bucket kept as a theoretical arrival time (GCRA).
+
+    Every acquire reserves the next token at call time, so waiters are served strictly in arrival order.
+    """
+
+    __slots__ = ('rate', 'burst', 'tat', 'queued')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tat = 0.0
+        self.queued = 0
+
+    def reserve(self, now: float) -> float:
+        interval = 1 / self.rate
+        tat = max(self.tat, now)
+        wait = max(0.0, tat - (self.burst - 1) * interval - now)
+        self.tat = tat + interval
+        return wait
+
+    def available(self, now: float) -> float:
+        return min(self.burst, max(0.0, (now - self.tat) * self.rate + self.burst))
+
+
+class HostRateLimiter(Middleware):
+    def __init__(self):
+        self.buckets: dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def limit_for(host: str) -> tuple[float, float]:
+        rate, burst = settings.RATE_LIMITS.get(host, settings.DEFAULT_RATE_LIMIT)
+        return rate, burst
+
+    def bucket(self, host: str) -> TokenBucket | None:
+        rate, burst = self.limit_for(host)
+        if rate <= 0:
+            return None
+
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(rate, burst)
+        elif (bucket.rate, bucket.burst) != (rate, max(burst, 1)):
+            bucket.rate, bucket.burst = rate, max(burst, 1)
+        return bucket
+
+    async def acquire(self, host: str) -> None:
+        bucket = self.bucket(host)
+        if bucket is None:
+            return
+
+        now = monotonic()
+        wait = bucket.reserve(now)
+        metrics.observe('limiter_wait_seconds', wait, host=host)
+        metrics.inc('limiter_acquired_total', host=host)
+        metrics.set('limiter_tokens_available', bucket.available(now), host=host)
+        if wait <= 0:
+            return
+
+        bucket.queued += 1
+        metrics.set('limiter_queued', bucket.queued, host=host)
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            bucket.queued -= 1
+            metrics.set('limiter_queued', bucket.queued, host=host)
+
+    async def __call__(self, handler, method: str, url, **kwargs):
+        await self.acquire(URL(url).host)
+        return await handler(method, url, **kwargs)
+
+
+rate_limiter = HostRateLimiter()
@@ -0,0 +1,38 @@
+import asyncio
+from time import monotonic
+
+from bot.config import settings
+from bot.core.limiter import TokenBucket
+from bot.utils.metrics import metrics
+
+# Prefetched tokens must outlive the wake-up by this much to be worth keeping
+MIN_VALIDITY = 60
+
+
+class AuthPrefetcher:
+    """Paces the logins sessions do ahead of their next cycle.
+
+    Prefetching is speculative, so it goes at AUTH_PREFETCH_RATE and never competes with logins of due cycles.
+    """
+
+    def __init__(self):
+        self.bucket: TokenBucket | None = None
+
+    @staticmethod
+    def horizon() -> float:
+        return max(settings.AUTH_PREFETCH_HORIZON, 0)
+
+    async def pace(self) -> None:
+        rate = settings.AUTH_PREFETCH_RATE
+        if rate <= 0:
+            return
+        if self.bucket is None:
+            self.bucket = TokenBucket(rate, 1)
+        self.bucket.rate = rate
+        wait = self.bucket.reserve(monotonic())
+        metrics.observe('auth_prefetch_wait_seconds', wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+auth_prefetcher = AuthPrefetcher()
@@ -1,10 +1,10 @@
 import asyncio
-import json
 import os
 from urllib.parse import urlparse
 from pyrogram import Client
 from bot.config import settings
-from bot.utils import logger
+from bot.utils.logger import logger
+from bot.utils.json_codec import codec
 
 PROXY_FILE_PATH = 'bot/config/proxies/session_proxy.json'
 
@@ -44,15 +44,15 @@ def get_proxy_input():
 def save_session_proxy(session_name, proxy_string):
     try:
         if os.path.exists(PROXY_FILE_PATH):
-            with open(PROXY_FILE_PATH, 'r') as f:
-                proxies = json.load(f)
+            with open(PROXY_FILE_PATH, 'rb') as f:
+                proxies = codec.loads(f.read())
         else:
             proxies = {}
 
         proxies[session_name] = proxy_string
 
         with open(PROXY_FILE_PATH, 'w') as f:
-            json.dump(proxies, f, indent=4)
+            f.write(codec.dumps(proxies, indent=True))
 
         logger.success(f"Session '{session_name}' and its proxy have been saved to {PROXY_FILE_PATH}")
     except Exception as e:
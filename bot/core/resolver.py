@@ -0,0 +1,154 @@
+import asyncio
+import socket
+from time import monotonic
+
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+from bot.config import settings
+from bot.utils.logger import logger
+from bot.utils.metrics import metrics
+
+# Entries are refreshed this long before they expire, so a due cycle never waits on a lookup
+REFRESH_AHEAD = 30
+MIN_REFRESH_INTERVAL = 1
+
+
+class LookupAbandoned(Exception):
+    """The caller that started a coalesced lookup was cancelled before it finished."""
+
+
+class DnsEntry:
+    __slots__ = ('records', 'expires_at', 'used_at')
+
+    def __init__(self, records: list, expires_at: float, used_at: float):
+        self.records = records
+        self.expires_at = expires_at
+        self.used_at = used_at
+
+
+class CachingResolver(AbstractResolver):
+    """Process-wide DNS cache shared by every connector.
+
+    Connectors come and go with each cycle, this cache outlives them. Lookups of the same name are
+    coalesced, and names used within the last TTL are re-resolved in the background before they expire.
+    """
+
+    def __init__(self):
+        self.entries: dict[tuple, DnsEntry] = {}
+        self.pending: dict[tuple, asyncio.Future] = {}
+        # Pre-resolved names are kept warm even while every session sleeps
+        self.pinned: set[tuple] = set()
+        self.inner: AbstractResolver | None = None
+
+    async def lookup(self, key: tuple) -> list:
+        if self.inner is None:
+            self.inner = DefaultResolver()
+
+        host, port, family = key
+        future = self.pending.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except LookupAbandoned:
+                # Says nothing about the name itself, so the lookup starts over with this caller leading it
+                return await self.lookup(key)
+
+        future = self.pending[key] = asyncio.get_running_loop().create_future()
+        started = monotonic()
+        try:
+            records = await self.inner.resolve(host, port, family=family)
+        except asyncio.CancelledError:
+            # Cancelling the future would cancel every caller waiting on it, not just the one that started it
+            future.set_exception(LookupAbandoned(host))
+            future.exception()
+            raise
+        except Exception as error:
+            metrics.inc('dns_errors_total', host=host)
+            future.set_exception(error)
+            # Nobody may be waiting on it; the error is still raised to the caller below
+            future.exception()
+            raise
+        else:
+            now = monotonic()
+            entry = self.entries.get(key)
+            if entry is None:
+                self.entries[key] = DnsEntry(records, now + settings.DNS_TTL, now)
+            else:
+                entry.records, entry.expires_at = records, now + settings.DNS_TTL
+            future.set_result(records)
+            return records
+        finally:
+            del self.pending[key]
+            metrics.observe('dns_lookup_seconds', monotonic() - started, host=host)
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> list:
+        key = (host, port, family)
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at > monotonic():
+            entry.used_at = monotonic()
+            metrics.inc('dns_cache_hits_total', host=host)
+            return entry.records
+
+        metrics.inc('dns_cache_misses_total', host=host)
+        try:
+            records = await self.lookup(key)
+        except OSError:
+            if entry is None:
+                raise
+            # A stale address beats no address while the resolver is having trouble
+            return entry.records
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.used_at = monotonic()
+        return records
+
+    async def prefetch(self, hosts, port: int = 443) -> None:
+        keys = [(host, port, socket.AF_UNSPEC) for host in hosts]
+        self.pinned.update(keys)
+        results = await asyncio.gather(*[self.lookup(key) for key in keys], return_exceptions=True)
+        resolved = 0
+        for (host, _, _), result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.warning(f"DNS | Could not pre-resolve {host}: {result}")
+            else:
+                resolved += 1
+        logger.info(f"DNS | Pre-resolved <cyan>{resolved}/{len(keys)}</cyan> hosts")
+
+    async def refresh_due(self) -> None:
+        now = monotonic()
+        due = []
+        for key, entry in list(self.entries.items()):
+            if entry.used_at < now - settings.DNS_TTL and key not in self.pinned:
+                # Nobody asked for it in a whole TTL, let it go instead of keeping it warm forever
+                del self.entries[key]
+            elif entry.expires_at - now <= REFRESH_AHEAD and key not in self.pending:
+                due.append(key)
+
+        for key, result in zip(due, await asyncio.gather(*[self.lookup(key) for key in due],
+                                                          return_exceptions=True)):
+            if isinstance(result, Exception):
+                logger.debug(f"DNS | Refresh of {key[0]} failed, keeping the old records: {result}")
+            else:
+                metrics.inc('dns_refreshes_total', host=key[0])
+
+    async def run(self, hosts) -> None:
+        await self.prefetch(hosts)
+        while True:
+            now = monotonic()
+            next_refresh = min((entry.expires_at - REFRESH_AHEAD for entry in self.entries.values()),
+                               default=now + settings.DNS_TTL)
+            # Names first looked up after the last pass are picked up on the next one
+            await asyncio.sleep(max(MIN_REFRESH_INTERVAL, min(next_refresh - now, REFRESH_AHEAD)))
+            await self.refresh_due()
+
+    async def close(self) -> None:
+        # Connectors close their resolver with them; the shared cache has to outlive them
+        pass
+
+
+dns_cache = CachingResolver()
+
+
+def connector_resolver() -> AbstractResolver | None:
+    return dns_cache if settings.DNS_CACHE else None
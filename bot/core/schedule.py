@@ -0,0 +1,112 @@
+import asyncio
+import os
+from contextlib import contextmanager
+from time import time
+from typing import NamedTuple
+
+from bot.core.ledger import LEDGER_DIR
+from bot.utils.json_codec import codec
+from bot.utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+SCHEDULE_PATH = os.path.join(LEDGER_DIR, 'schedule.json')
+SAVE_INTERVAL = 60
+# Sessions that have not been seen for this long are dropped from the file
+RETENTION = 7 * 86400
+
+
+class ScheduleEntry(NamedTuple):
+    next_due: float
+    # Server timestamp, as in the ledger
+    farming_end: float | None
+    status: str
+
+
+class ScheduleSnapshot:
+    """When each session is due next, kept on disk so a restart resumes the schedule.
+
+    The file maps session names to [next_due, farming_end, status]. Worker processes share it, each one
+    merges its own sessions into what is already there while holding a lock on a file next to it, so two
+    workers saving at once cannot drop each other's sessions.
+    """
+
+    def __init__(self, path: str = SCHEDULE_PATH):
+        self.path = path
+        self.entries: dict[str, ScheduleEntry] = {}
+        self.changed: set[str] = set()
+
+    def record(self, session_name: str, next_due: float, farming_end: float | None, status: str) -> None:
+        self.entries[session_name] = ScheduleEntry(round(next_due), farming_end, status)
+        self.changed.add(session_name)
+
+    def read(self) -> dict[str, ScheduleEntry]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'rb') as schedule_file:
+                data = codec.loads(schedule_file.read())
+            return {name: ScheduleEntry(*entry) for name, entry in data.items()}
+        except Exception as e:
+            logger.warning(f"Schedule | Ignoring unreadable {self.path}: {e}")
+            return {}
+
+    def load(self) -> None:
+        self.entries = self.read()
+        self.changed.clear()
+        if self.entries:
+            now = time()
+            due = sum(entry.next_due <= now for entry in self.entries.values())
+            logger.info(f"Schedule | Restored <cyan>{len(self.entries)}</cyan> sessions, <cyan>{due}</cyan> due now")
+
+    @contextmanager
+    def locked(self):
+        # The snapshot itself is replaced on every save, so the lock lives on a file that stays put
+        with open(f"{self.path}.lock", 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+        stale = time() - RETENTION
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self.locked():
+                entries = self.read()
+                entries.update((name, self.entries[name]) for name in self.changed)
+                # Written aside and swapped in, so a crash mid-write leaves the previous snapshot intact
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w') as schedule_file:
+                    schedule_file.write(codec.dumps({name: list(entry) for name, entry in entries.items()
+                                                     if entry.next_due > stale}))
+                os.replace(temp_path, self.path)
+            self.changed.clear()
+        except Exception as e:
+            logger.error(f"Schedule | Error saving {self.path}: {e}")
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(SAVE_INTERVAL)
+                self.save()
+        finally:
+            self.save()
+
+
+schedule = ScheduleSnapshot()
@@ -1,4 +1,5 @@
 import asyncio
+import base64
 import os
 import json
 import traceback
@@ -8,7 +9,8 @@ import random
 import string
 import requests
 
-from aiocfscrape import CloudflareScraper
+from time import time, perf_counter, monotonic
+
 from aiohttp_proxy import ProxyConnector
 from better_proxy import Proxy
 from typing import Tuple
@@ -17,16 +19,53 @@ from pyrogram.errors import Unauthorized, UserDeactivated, AuthKeyUnregistered,
 from pyrogram.raw.functions.messages import RequestAppWebView
 from pyrogram.raw import types
 from urllib.parse import unquote, parse_qs
+from yarl import URL
 
 from bot.config import settings
+from bot.config.watcher import config_watcher
 from bot.core.agents import generate_random_user_agent
+from bot.core.bandwidth import BandwidthMiddleware, session_traffic
+from bot.core.cache import CachingMiddleware
+from bot.core.cassette import CassetteRecorder
+from bot.core.deadline import TimeoutMiddleware, cycle_deadline, remaining
+from bot.core.http import HttpSession
+from bot.core.limiter import rate_limiter
+from bot.core.concurrency import adaptive_concurrency
+from bot.core.dispatcher import dispatcher, proxy_key
+from bot.core.resolver import connector_resolver
+from bot.core.schedule import schedule
+from bot.core.prefetch import auth_prefetcher, MIN_VALIDITY
+from bot.core.fleet import fleet, FleetMiddleware
+from bot.core.transport import create_transport
+from bot.core.tg_scheduler import tg_scheduler
+from bot.core.tasks import read_tasks
+from bot.core.ledger import Ledger, FRIENDS_RECHECK, PHASE_PRIORITY, plan_cycle
 from bot.utils.logger import logger
-from bot.exceptions import InvalidSession
+from bot.utils.json_codec import codec, read_json
+from bot.utils.metrics import metrics, BYTE_BUCKETS
+from bot.exceptions import InvalidSession, AuthorizationFailed, DeadlineExceeded
 from bot.utils.connection_manager import connection_manager
 from .headers import headers
 
 
 class Tapper:
+    __slots__ = (
+        'session_name', 'tg_client', 'user_id', 'username', 'first_name', 'last_name', 'start_param',
+        'first_run', 'proxy', 'user_agent', 'sec_ch_ua', 'http_client', 'proxy_conn', 'tokens', 'play_passes',
+        'balance_logged', 'ledger', 'phase', 'wake_at', 'config_version',
+    )
+
+    gateway_url = "https://gateway.blum.codes"
+    game_url = "https://game-domain.blum.codes"
+    wallet_url = "https://wallet-domain.blum.codes"
+    subscription_url = "https://subscription.blum.codes"
+    tribe_url = "https://tribe-domain.blum.codes"
+    user_url = "https://user-domain.blum.codes"
+    earn_domain = "https://earn-domain.blum.codes"
+    ipinfo_url = "https://ipinfo.io/json"
+
+    user_agents_dir = "user_agents"
+
     def __init__(self, tg_client: Client, proxy: str):
         self.session_name = tg_client.name
         self.tg_client = tg_client
@@ -34,29 +73,39 @@ class Tapper:
         self.username = None
         self.first_name = None
         self.last_name = None
-        self.fullname = None
         self.start_param = None
-        self.peer = None
         self.first_run = None
         self.proxy = proxy
-        self.gateway_url = "https://gateway.blum.codes"
-        self.game_url = "https://game-domain.blum.codes"
-        self.wallet_url = "https://wallet-domain.blum.codes"
-        self.subscription_url = "https://subscription.blum.codes"
-        self.tribe_url = "https://tribe-domain.blum.codes"
-        self.user_url = "https://user-domain.blum.codes"
-        self.earn_domain = "https://earn-domain.blum.codes"
-
-        self.user_agents_dir = "user_agents"
-        self.session_ug_dict = {}
-        self.headers = headers.copy()
+
+        self.user_agent = None
+        self.sec_ch_ua = None
+
+        self.http_client = None
+        self.proxy_conn = None
+        self.tokens = (None, None)
+        self.play_passes = None
+        self.balance_logged = False
+        self.ledger = Ledger(self.session_name)
+        self.phase = None
+        self.wake_at = None
+        self.config_version = config_watcher.version
 
     async def init(self):
         os.makedirs(self.user_agents_dir, exist_ok=True)
         await self.load_user_agents()
-        user_agent, sec_ch_ua = await self.check_user_agent()
-        self.headers['User-Agent'] = user_agent
-        self.headers['Sec-Ch-Ua'] = sec_ch_ua
+        await self.check_user_agent()
+        await self.ledger.load()
+
+    @classmethod
+    def known_hosts(cls) -> set[str]:
+        return {URL(value).host for value in vars(cls).values()
+                if isinstance(value, str) and value.startswith('https://')}
+
+    def build_headers(self) -> dict:
+        request_headers = {**headers, 'User-Agent': self.user_agent, 'Sec-Ch-Ua': self.sec_ch_ua}
+        if self.tokens[0]:
+            request_headers['Authorization'] = f"Bearer {self.tokens[0]}"
+        return request_headers
 
     async def generate_random_user_agent(self):
         user_agent, sec_ch_ua = generate_random_user_agent(device_type='android', browser_type='webview')
@@ -79,12 +128,13 @@ class Tapper:
                         logger.warning(f"{self.session_name} | User agent file '{filename}' is empty.")
                         return
 
-                    data = json.loads(content)
+                    data = codec.loads(content)
                     if data['session_name'] != self.session_name:
                         logger.warning(f"{self.session_name} | Session name mismatch in file '{filename}'.")
                         return
 
-                    self.session_ug_dict = {self.session_name: data}
+                    self.user_agent = data.get('user_agent')
+                    self.sec_ch_ua = data.get('sec_ch_ua')
             except json.JSONDecodeError:
                 logger.warning(f"{self.session_name} | Invalid JSON in user agent file: {filename}")
             except Exception as e:
@@ -104,30 +154,34 @@ class Tapper:
         file_path = os.path.join(self.user_agents_dir, f"{self.session_name}.json")
         try:
             async with aiofiles.open(file_path, 'w') as user_agent_file:
-                await user_agent_file.write(json.dumps(new_session_data, indent=4, ensure_ascii=False))
+                await user_agent_file.write(codec.dumps(new_session_data, indent=True))
         except Exception as e:
             logger.error(f"{self.session_name} | Error saving user agent data: {e}")
 
-        self.session_ug_dict = {self.session_name: new_session_data}
+        self.user_agent = user_agent_str
+        self.sec_ch_ua = sec_ch_ua
 
         logger.info(f"{self.session_name} | User agent saved successfully: {user_agent_str}")
 
         return user_agent_str, sec_ch_ua
 
     async def check_user_agent(self) -> Tuple[str, str]:
-        if self.session_name not in self.session_ug_dict:
+        if not self.user_agent or not self.sec_ch_ua:
             return await self.save_user_agent()
 
-        session_data = self.session_ug_dict[self.session_name]
-        if 'user_agent' not in session_data or 'sec_ch_ua' not in session_data:
-            return await self.save_user_agent()
-
-        return session_data['user_agent'], session_data['sec_ch_ua']
+        return self.user_agent, self.sec_ch_ua
 
     async def check_proxy(self, http_client: aiohttp.ClientSession) -> bool:
+        checked = self.ledger.proxy_check
+        if checked and checked.get('proxy') == proxy_key(self.proxy) and \
+                time() - checked.get('checked_at', 0) < settings.PROXY_CHECK_TTL:
+            logger.info(f"{self.session_name} | Proxy checked {int((time() - checked['checked_at']) // 60)} min ago! "
+                        f"Country: <cyan>{checked.get('country')}</cyan> | Proxy IP: {checked.get('ip')}")
+            return True
+
         try:
-            response = await http_client.get(url='https://ipinfo.io/json', timeout=aiohttp.ClientTimeout(total=5))
-            data = await response.json()
+            response = await http_client.get(url=self.ipinfo_url, timeout=aiohttp.ClientTimeout(total=5))
+            data = await read_json(response)
 
             ip = data.get('ip')
             city = data.get('city')
@@ -135,6 +189,8 @@ class Tapper:
 
             logger.info(
                 f"{self.session_name} | Check proxy! Country: <cyan>{country}</cyan> | City: <light-yellow>{city}</light-yellow> | Proxy IP: {ip}")
+            self.ledger.proxy_check = {'proxy': proxy_key(self.proxy), 'checked_at': time(),
+                                       'ip': ip, 'city': city, 'country': country}
 
             return True
 
@@ -155,23 +211,25 @@ class Tapper:
         else:
             proxy_dict = None
 
+        if self.tg_client is None:
+            self.tg_client = create_tg_client(self.session_name)
         self.tg_client.proxy = proxy_dict
 
+        with_tg = True
         try:
-            with_tg = True
-
             if not self.tg_client.is_connected:
                 with_tg = False
                 try:
-                    await self.tg_client.connect()
+                    await tg_scheduler.call(self.session_name, None, self.tg_client.connect)
                 except (Unauthorized, UserDeactivated, AuthKeyUnregistered):
                     raise InvalidSession(self.session_name)
 
+            dc_id = await self.tg_client.storage.dc_id()
             self.start_param = random.choices([settings.REF_ID, "ref_QmiirCtfhH"], weights=[75, 25], k=1)[0]
-            peer = await self.tg_client.resolve_peer('BlumCryptoBot')
+            peer = await tg_scheduler.call(self.session_name, dc_id, self.tg_client.resolve_peer, 'BlumCryptoBot')
             InputBotApp = types.InputBotAppShortName(bot_id=peer, short_name="app")
 
-            web_view = await self.tg_client.invoke(RequestAppWebView(
+            web_view = await tg_scheduler.call(self.session_name, dc_id, self.tg_client.invoke, RequestAppWebView(
                 peer=peer,
                 app=InputBotApp,
                 platform='android',
@@ -181,12 +239,11 @@ class Tapper:
 
             auth_url = web_view.url
             #print(auth_url)
-            tg_web_data = unquote(
-                string=auth_url.split('tgWebAppData=', maxsplit=1)[1].split('&tgWebAppVersion', maxsplit=1)[0])
+            tg_web_data = extract_tg_web_data(auth_url)
 
             try:
                 if self.user_id == 0:
-                    information = await self.tg_client.get_me()
+                    information = await tg_scheduler.call(self.session_name, dc_id, self.tg_client.get_me)
                     self.user_id = information.id
                     self.first_name = information.first_name or ''
                     self.last_name = information.last_name or ''
@@ -194,9 +251,6 @@ class Tapper:
             except Exception as e:
                 print(e)
 
-            if with_tg is False:
-                await self.tg_client.disconnect()
-
             return tg_web_data
 
         except InvalidSession as error:
@@ -205,11 +259,20 @@ class Tapper:
         except Exception as error:
             logger.error(
                 f"<light-yellow>{self.session_name}</light-yellow> | Unknown error during Authorization: {error}")
-            await asyncio.sleep(delay=3)
+
+        finally:
+            # Also when cancelled mid-FloodWait, e.g. a prefetch cut off at wake-up: a client connected here and
+            # left connected is kept by release_tg_client and would hold its MTProto connection for good
+            if with_tg is False and self.tg_client.is_connected:
+                try:
+                    await self.tg_client.disconnect()
+                except Exception:
+                    pass
+
+        await dispatcher.pause(3)
 
     async def login(self, http_client: aiohttp.ClientSession, initdata):
         try:
-            await http_client.options(url=f'{self.user_url}/api/v1/auth/provider/PROVIDER_TELEGRAM_MINI_APP')
             while True:
                 if settings.USE_REF is False:
 
@@ -219,10 +282,10 @@ class Tapper:
                                                   json=json_data, ssl=False)
                     if resp.status == 520:
                         logger.warning(f"{self.session_name} | Relogin")
-                        await asyncio.sleep(delay=3)
+                        await dispatcher.pause(3)
                         continue
 
-                    resp_json = await resp.json()
+                    resp_json = await read_json(resp)
 
                     return resp_json.get("token").get("access"), resp_json.get("token").get("refresh")
 
@@ -236,9 +299,9 @@ class Tapper:
                                                   json=json_data, ssl=False)
                     if resp.status == 520:
                         logger.warning(f"{self.session_name} | Relogin")
-                        await asyncio.sleep(delay=3)
+                        await dispatcher.pause(3)
                         continue
-                    resp_json = await resp.json()
+                    resp_json = await read_json(resp)
 
                     if resp_json.get("message") == "rpc error: code = AlreadyExists desc = Username is not available":
                         while True:
@@ -254,10 +317,10 @@ class Tapper:
                                 json=json_data, ssl=False)
                             if resp.status == 520:
                                 logger.warning(f"{self.session_name} | Relogin")
-                                await asyncio.sleep(delay=3)
+                                await dispatcher.pause(3)
                                 continue
 
-                            resp_json = await resp.json()
+                            resp_json = await read_json(resp)
 
                             if resp_json.get("token"):
                                 logger.info(f"{self.session_name} | Registered using ref - {self.start_param} and nickname - {new_name}")
@@ -271,14 +334,14 @@ class Tapper:
                                                               json=json_data, ssl=False)
                                 if resp.status == 520:
                                     logger.warning(f"{self.session_name} | Relogin")
-                                    await asyncio.sleep(delay=3)
+                                    await dispatcher.pause(3)
                                     continue
-                                resp_json = await resp.json()
+                                resp_json = await read_json(resp)
                                 return resp_json.get("token").get("access"), resp_json.get("token").get("refresh")
 
                             else:
                                 logger.info(f"{self.session_name} | Username taken, retrying register with new name")
-                                await asyncio.sleep(1)
+                                await dispatcher.pause(1)
 
                     elif resp_json.get("message") == 'account is already connected to another user':
 
@@ -288,9 +351,9 @@ class Tapper:
                                                       json=json_data, ssl=False)
                         if resp.status == 520:
                             logger.warning(f"{self.session_name} | Relogin")
-                            await asyncio.sleep(delay=3)
+                            await dispatcher.pause(3)
                             continue
-                        resp_json = await resp.json()
+                        resp_json = await read_json(resp)
 
                         return resp_json.get("token").get("access"), resp_json.get("token").get("refresh")
 
@@ -299,6 +362,8 @@ class Tapper:
                         logger.success(f"{self.session_name} | Registered using ref - {self.start_param} and nickname - {self.username}")
                         return resp_json.get("token").get("access"), resp_json.get("token").get("refresh")
 
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as error:
             logger.error(f"{self.session_name}| Login error {error}")
             return None, None
@@ -307,9 +372,11 @@ class Tapper:
         try:
             resp = await http_client.post(f'{self.earn_domain}/api/v1/tasks/{task_id}/claim',
                                           ssl=False)
-            resp_json = await resp.json()
+            resp_json = await read_json(resp)
 
             return resp_json.get('status') == "FINISHED"
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} | Claim task error {error}")
 
@@ -318,6 +385,8 @@ class Tapper:
             resp = await http_client.post(f'{self.earn_domain}/api/v1/tasks/{task_id}/start',
                                           ssl=False)
 
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as error:
             logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Start complete error {error}")
 
@@ -336,7 +405,7 @@ class Tapper:
 
             resp = await http_client.post(f'{self.earn_domain}/api/v1/tasks/{task_id}/validate',
                                           json=payload, ssl=False)
-            resp_json = await resp.json()
+            resp_json = await read_json(resp)
             if resp_json.get('status') == "READY_FOR_CLAIM":
                 status = await self.claim_task(http_client, task_id)
                 if status:
@@ -344,6 +413,8 @@ class Tapper:
             else:
                 return False
 
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as error:
             logger.error(f"{self.session_name}| Claim task error {error}")
 
@@ -362,11 +433,13 @@ class Tapper:
 
         try:
             resp = await http_client.get(f'{self.tribe_url}/api/v1/tribe/by-chatname/{random_chatname}', ssl=False)
-            json_response = await resp.json()
+            json_response = await read_json(resp)
             title = json_response.get('title')
 
             if title is None:
                 logger.warning(f"{self.session_name}| Title not found in response.")
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} | Get tribe error: {error}")
 
@@ -382,6 +455,8 @@ class Tapper:
             else:
                 logger.info(f"{self.session_name} | Failed to join the tribe. Response: {text}")
 
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} | Join tribe error: {error}")
 
@@ -398,13 +473,15 @@ class Tapper:
             else:
                 logger.info(f"{self.session_name} | Failed to leave the tribe. Status code: {resp.status}")
 
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | An error occurred: {e}")
 
     async def my_tribe(self, http_client: aiohttp.ClientSession):
         try:
             resp = await http_client.get(f'{self.tribe_url}/api/v1/tribe/my', ssl=False)
-            json_response = await resp.json()
+            json_response = await read_json(resp)
 
             tribe_id = json_response.get('id')
             title = json_response.get('title')
@@ -419,6 +496,8 @@ class Tapper:
         except aiohttp.ClientResponseError as e:
             logger.error(f"{self.session_name} | HTTP error occurred: {e.status} - {e.message}")
             return None, None
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | An unexpected error occurred: {e}")
             return None, None
@@ -431,41 +510,9 @@ class Tapper:
                     continue
                 else:
                     break
-            resp_json = await resp.json()
-
-            def collect_tasks(resp_json):
-                collected_tasks = []
-                for task in resp_json:
-                    if task.get('sectionType') == 'HIGHLIGHTS':
-                        tasks_list = task.get('tasks', [])
-                        for t in tasks_list:
-                            sub_tasks = t.get('subTasks')
-                            if sub_tasks:
-                                for sub_task in sub_tasks:
-                                    collected_tasks.append(sub_task)
-                            if t.get('type') != 'PARTNER_INTEGRATION':
-                                collected_tasks.append(t)
-
-                    if task.get('sectionType') == 'WEEKLY_ROUTINE':
-                        tasks_list = task.get('tasks', [])
-                        for t in tasks_list:
-                            sub_tasks = t.get('subTasks', [])
-                            for sub_task in sub_tasks:
-                                # print(sub_task)
-                                collected_tasks.append(sub_task)
-
-                    if task.get('sectionType') == "DEFAULT":
-                        sub_tasks = task.get('subSections', [])
-                        for sub_task in sub_tasks:
-                            tasks = sub_task.get('tasks', [])
-                            for task_basic in tasks:
-                                collected_tasks.append(task_basic)
-
-                return collected_tasks
-
-            all_tasks = collect_tasks(resp_json)
-
-            return all_tasks
+            return await read_tasks(resp)
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} | Get tasks error {error}")
             return []
@@ -497,6 +544,7 @@ class Tapper:
                              refresh_token) = await self.refresh_token(http_client=http_client, token=refresh_token)
                             if access_token:
                                 http_client.headers["Authorization"] = f"Bearer {access_token}"
+                                self.tokens = (access_token, refresh_token)
                                 logger.success(f"{self.session_name} | Got new token")
                                 total_games = 0
                                 break
@@ -504,7 +552,7 @@ class Tapper:
                                 logger.error(f"{self.session_name} | Can`t get new token, trying again")
                                 continue
 
-                await asyncio.sleep(random.uniform(30, 40))
+                await dispatcher.pause(random.uniform(30, 40))
 
                 data_elig = await self.elig_dogs(http_client=http_client)
                 if data_elig:
@@ -519,9 +567,11 @@ class Tapper:
                     logger.info(f"{self.session_name} | Couldn't play game | msg: {msg} play_passes: {play_passes}")
                     break
 
-                await asyncio.sleep(random.uniform(1, 5))
+                await dispatcher.pause(random.uniform(1, 5))
 
                 play_passes -= 1
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(
                 f"<light-yellow>{self.session_name.ljust(8)}</light-yellow> | Error occurred during play game: {e}")
@@ -529,11 +579,13 @@ class Tapper:
     async def start_game(self, http_client: aiohttp.ClientSession):
         try:
             resp = await http_client.post(f"{self.game_url}/api/v2/game/play", ssl=False)
-            response_data = await resp.json()
+            response_data = await read_json(resp)
             if "gameId" in response_data:
                 return response_data.get("gameId")
             elif "message" in response_data:
                 return response_data.get("message")
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error occurred during start game: {e}")
 
@@ -541,10 +593,12 @@ class Tapper:
         try:
             resp = await http_client.get('https://game-domain.blum.codes/api/v2/game/eligibility/dogs_drop')
             if resp is not None:
-                data = await resp.json()
+                data = await read_json(resp)
                 eligible = data.get('eligible', False)
                 return eligible
 
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Failed elif dogs, error: {e}")
         return None
@@ -552,7 +606,7 @@ class Tapper:
     async def get_data_payload(self):
         url = 'https://raw.githubusercontent.com/zuydd/database/main/blum.json'
         data = requests.get(url=url)
-        return data.json()
+        return codec.loads(data.content)
 
     async def create_payload(self, http_client: aiohttp.ClientSession, game_id, points, dogs):
         data = await self.get_data_payload()
@@ -564,7 +618,7 @@ class Tapper:
                                                                                         'dogs': dogs
                                                                                         })
         if resp is not None:
-            data = await resp.json()
+            data = await read_json(resp)
             if "payload" in data:
                 return data["payload"]
             return None
@@ -582,21 +636,26 @@ class Tapper:
             txt = await resp.text()
 
             return True if txt == 'OK' else txt, points
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error occurred during claim game: {e}")
 
     async def claim(self, http_client: aiohttp.ClientSession):
         try:
-            while True:
+            for _ in range(3):
                 resp = await http_client.post(f"{self.game_url}/api/v1/farming/claim", ssl=False)
-                if resp.status not in [200, 201]:
-                    continue
-                else:
+                if resp.status in [200, 201]:
                     break
+            else:
+                logger.warning(f"{self.session_name} | Farming claim rejected. Status code: {resp.status}")
+                return None
 
-            resp_json = await resp.json()
+            resp_json = await read_json(resp)
 
             return int(resp_json.get("timestamp") / 1000), resp_json.get("availableBalance")
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.info(f"{self.session_name} | Error occurred during claim: {e}")
 
@@ -606,7 +665,16 @@ class Tapper:
 
             if resp.status != 200:
                 resp = await http_client.post(f"{self.game_url}/api/v1/farming/start", ssl=False)
+
+            if resp.status == 200:
+                end_time = (await read_json(resp)).get("endTime")
+                self.ledger.farming_end = int(end_time / 1000) if end_time is not None else None
+            else:
+                self.ledger.farming_end = None
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
+            self.ledger.farming_end = None
             logger.error(f"{self.session_name} | Error occurred during start: {e}")
 
     async def friend_balance(self, http_client: aiohttp.ClientSession):
@@ -617,12 +685,19 @@ class Tapper:
                     continue
                 else:
                     break
-            resp_json = await resp.json()
+            resp_json = await read_json(resp)
             claim_amount = resp_json.get("amountForClaim")
             is_available = resp_json.get("canClaim")
 
+            can_claim_at = resp_json.get("canClaimAt")
+            if not is_available:
+                self.ledger.friends_claim_at = (float(can_claim_at) / 1000 if can_claim_at
+                                                else self.ledger.server_time() + FRIENDS_RECHECK)
+
             return (claim_amount,
                     is_available)
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error occurred during friend balance: {e}")
 
@@ -630,21 +705,23 @@ class Tapper:
         try:
 
             resp = await http_client.post(f"{self.user_url}/api/v1/friends/claim", ssl=False)
-            resp_json = await resp.json()
+            resp_json = await read_json(resp)
             amount = resp_json.get("claimBalance")
             if resp.status != 200:
                 resp = await http_client.post(f"{self.user_url}/api/v1/friends/claim", ssl=False)
-                resp_json = await resp.json()
+                resp_json = await read_json(resp)
                 amount = resp_json.get("claimBalance")
 
             return amount
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error occurred during friends claim: {e}")
 
     async def balance(self, http_client: aiohttp.ClientSession):
         try:
             resp = await http_client.get(f"{self.game_url}/api/v1/user/balance", ssl=False)
-            resp_json = await resp.json()
+            resp_json = await read_json(resp)
 
             timestamp = resp_json.get("timestamp")
             play_passes = resp_json.get("playPasses")
@@ -655,10 +732,16 @@ class Tapper:
                 start_time = resp_json["farming"].get("startTime")
                 end_time = resp_json["farming"].get("endTime")
 
+            if timestamp is not None:
+                self.ledger.sync_clock(int(timestamp / 1000))
+            self.ledger.farming_end = int(end_time / 1000) if end_time is not None else 0
+
             return (int(timestamp / 1000) if timestamp is not None else None,
                     int(start_time / 1000) if start_time is not None else None,
                     int(end_time / 1000) if end_time is not None else None,
                     play_passes)
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error occurred during balance: {e}")
 
@@ -670,7 +753,7 @@ class Tapper:
                 logger.error(f"{self.session_name} | Failed to retrieve balance. Status code: {resp.status}")
                 return None
 
-            resp_json = await resp.json()
+            resp_json = await read_json(resp)
             # self.info(f"Response JSON for balance: {resp_json}")
 
             points = resp_json.get("points", [])
@@ -681,6 +764,8 @@ class Tapper:
                 logger.error(f"{self.session_name} | No points found in response.")
                 return None
 
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error occurred during balance retrieval: {e}")
             return None
@@ -690,7 +775,19 @@ class Tapper:
             resp = await http_client.post(f"{self.game_url}/api/v1/daily-reward?offset=-180",
                                           ssl=False)
             txt = await resp.text()
-            return True if txt == 'OK' else txt
+            if resp.status == 200:
+                return 'claimed'
+            # A repeat claim is rejected with 400 and {"message": "same day"}; nothing else proves it was claimed
+            try:
+                message = codec.loads(txt).get('message') if resp.status == 400 else None
+            except (ValueError, AttributeError):
+                message = None
+            if message == 'same day':
+                return 'already claimed'
+            logger.warning(f"{self.session_name} | Daily reward claim failed. Status code: {resp.status}, "
+                           f"response: {txt[:200]}")
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error occurred during claim daily reward: {e}")
 
@@ -699,149 +796,380 @@ class Tapper:
             del http_client.headers["Authorization"]
         json_data = {'refresh': token}
         resp = await http_client.post(f"{self.user_url}/api/v1/auth/refresh", json=json_data, ssl=False)
-        resp_json = await resp.json()
+        resp_json = await read_json(resp)
 
         return resp_json.get('access'), resp_json.get('refresh')
 
+    def http_middlewares(self) -> list:
+        # Cache hits never reach the limiters; queueing for a token or a slot must not eat into the request's timeout
+        middlewares = [CachingMiddleware(self.session_name), rate_limiter, adaptive_concurrency, TimeoutMiddleware(),
+                       BandwidthMiddleware(self.session_name, self.proxy)]
+        if settings.DASHBOARD:
+            # Outside the timeout so requests it cuts short count as errors
+            middlewares.insert(3, FleetMiddleware())
+        if settings.CASSETTE_DIR:
+            middlewares.append(CassetteRecorder(os.path.join(settings.CASSETTE_DIR, f"{self.session_name}.jsonl.gz")))
+        return middlewares
+
+    def http_transport(self):
+        return create_transport(settings.HTTP_TRANSPORT, proxy=self.proxy, resolver=connector_resolver())
+
+    def http_connector(self) -> aiohttp.TCPConnector:
+        resolver = connector_resolver()
+        self.proxy_conn = ProxyConnector.from_url(self.proxy, resolver=resolver) if self.proxy else None
+        return self.proxy_conn or aiohttp.TCPConnector(resolver=resolver)
+
+    def open_http_client(self) -> None:
+        self.http_client = HttpSession(headers=self.build_headers(), connector=self.http_connector(),
+                                       transport=self.http_transport(), json_serialize=codec.dumps,
+                                       middlewares=self.http_middlewares())
+        connection_manager.add(self.http_client)
+
+    async def close_http_client(self) -> None:
+        if self.http_client is not None:
+            await self.http_client.close()
+            connection_manager.remove(self.http_client)
+        if self.proxy_conn and not self.proxy_conn.closed:
+            await self.proxy_conn.close()
+        self.http_client = None
+        self.proxy_conn = None
+
+    def release_tg_client(self) -> None:
+        # An idle pyrogram client keeps its storage, dispatcher and executor around; a new one is made on login
+        if self.tg_client is not None and not self.tg_client.is_connected:
+            self.tg_client = None
+
+    async def sync_config(self) -> None:
+        if self.config_version == config_watcher.version:
+            return
+        self.config_version = config_watcher.version
+
+        proxy = config_watcher.proxies.get(self.session_name) if settings.USE_PROXY else None
+        if settings.USE_PROXY and not proxy:
+            logger.warning(f"{self.session_name} | No proxy bound after reload, keeping the current one")
+            return
+        if proxy == self.proxy:
+            return
+
+        logger.info(f"{self.session_name} | Proxy binding changed, replacing connector")
+        self.proxy = proxy
+        if self.http_client is not None and not self.http_client.closed:
+            await self.close_http_client()
+            self.open_http_client()
+
+    async def enter_phase(self, phase: str) -> None:
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded(f"no time left for phase {phase}")
+        self.phase = phase
+        await self.sync_config()
+
+    def record_schedule(self, status: str) -> None:
+        schedule.record(self.session_name, self.wake_at, self.ledger.farming_end, status)
+
+    async def backoff(self, delay: int, status: str) -> None:
+        self.phase = 'backoff'
+        self.wake_at = time() + delay
+        self.record_schedule(status)
+        await asyncio.sleep(delay)
+
+    async def sleep(self, delay: int, status: str = 'ok') -> None:
+        self.phase = 'sleep'
+        self.release_tg_client()
+        started = time()
+        sleep_range = tuple(settings.SLEEP_TIME)
+        self.wake_at = started + delay
+        self.record_schedule(status)
+        prefetched = False
+
+        while (remaining := self.wake_at - time()) > 0:
+            lead = remaining - auth_prefetcher.horizon()
+            if not prefetched and auth_prefetcher.horizon() and lead <= 0:
+                prefetched = True
+                await self.prefetch_auth()
+                continue
+            if not await config_watcher.wait(lead if not prefetched and auth_prefetcher.horizon() else remaining):
+                continue
+            await self.sync_config()
+            if tuple(settings.SLEEP_TIME) != sleep_range:
+                sleep_range = tuple(settings.SLEEP_TIME)
+                self.wake_at = started + random.randint(sleep_range[0], sleep_range[1])
+                logger.info(f"{self.session_name} | SLEEP_TIME changed, waking up in "
+                            f"<yellow>{max(0, int(self.wake_at - time()))}s</yellow>")
+                self.record_schedule(status)
+
+    async def prefetch_auth(self) -> None:
+        if token_expires_at(self.tokens[0]) > self.wake_at + MIN_VALIDITY:
+            return
+
+        self.phase = 'authing'
+        try:
+            # Whatever is left unfinished at wake-up is done by the cycle's own login
+            async with asyncio.timeout(max(self.wake_at - time(), 0)):
+                await auth_prefetcher.pace()
+                async with dispatcher.slot(self.proxy, PHASE_PRIORITY['prefetch']):
+                    self.open_http_client()
+                    try:
+                        await self.authorize()
+                    finally:
+                        await self.close_http_client()
+        except InvalidSession:
+            raise
+        except asyncio.TimeoutError:
+            metrics.inc('auth_prefetch_total', result='late')
+        except Exception as error:
+            metrics.inc('auth_prefetch_total', result='error')
+            logger.warning(f"{self.session_name} | Auth prefetch failed, logging in when due: {error}")
+        else:
+            metrics.inc('auth_prefetch_total', result='ok')
+            logger.debug(f"{self.session_name} | Credentials ready for the next cycle")
+        finally:
+            self.phase = 'sleep'
+            self.release_tg_client()
+
+    async def phase_login(self) -> None:
+        if token_expires_at(self.tokens[0]) > time() + 60:
+            return
+        await self.authorize()
+
+    async def authorize(self) -> None:
+        if "Authorization" in self.http_client.headers:
+            del self.http_client.headers["Authorization"]
+
+        init_data = await self.get_tg_web_data()
+        if not init_data:
+            raise AuthorizationFailed(self.session_name)
+
+        access_token, refresh_token = await self.login(http_client=self.http_client, initdata=init_data)
+        self.tokens = (access_token, refresh_token)
+
+        self.http_client.headers["Authorization"] = f"Bearer {access_token}"
+
+        if self.first_run is not True:
+            logger.success(f"{self.session_name} | Logged in successfully")
+            self.first_run = True
+
+    async def phase_balance(self) -> None:
+        timestamp, start_time, end_time, play_passes = await self.balance(http_client=self.http_client)
+        self.play_passes = play_passes
+
+        if self.balance_logged:
+            return
+
+        balance = await self.wallet(self.http_client)
+
+        if balance is not None:
+            logger.info(f"{self.session_name} | Balance: <green>{balance:,.0f}</green> BP | You have <ly>{play_passes}</ly> play passes")
+            self.balance_logged = True
+
+    async def phase_daily_reward(self) -> None:
+        outcome = await self.claim_daily_reward(http_client=self.http_client)
+        if outcome is not None:
+            # Anything else leaves the date alone, so the claim is tried again next cycle
+            self.ledger.daily_reward_date = self.ledger.server_date()
+        if outcome == 'claimed':
+            logger.success(f"{self.session_name} | Claimed daily reward!")
+
+    async def phase_friends(self) -> None:
+        claim_amount, is_available = await self.friend_balance(http_client=self.http_client)
+
+        if claim_amount != 0 and is_available:
+            amount = await self.friend_claim(http_client=self.http_client)
+            self.ledger.friends_claim_at = self.ledger.server_time() + FRIENDS_RECHECK
+            logger.success(f"{self.session_name} | Claimed friend ref reward <cyan>{amount}</cyan>")
+
+    async def phase_games(self) -> None:
+        if self.play_passes and self.play_passes > 0 and settings.PLAY_GAMES is True:
+            await self.play_game(http_client=self.http_client, play_passes=self.play_passes,
+                                 refresh_token=self.tokens[1])
+
+    async def phase_tribe(self) -> None:
+        tribe_id, title = await self.my_tribe(http_client=self.http_client)
+        self.ledger.tribe_checked_at = self.ledger.server_time()
+        await dispatcher.pause(random.randint(5, 15))
+
+        # if tribe_id == '':
+        #     await self.leave_tribe(http_client=self.http_client)
+        #     await asyncio.sleep(random.randint(10, 45))
+        #     await self.join_tribe(http_client=self.http_client)
+
+        await dispatcher.pause(random.randint(10, 45))
+
+    async def phase_tasks(self) -> None:
+        ledger = self.ledger
+        tasks = await self.get_tasks(http_client=self.http_client)
+        started = False
+
+        for task in tasks:
+            if task.status == "FINISHED":
+                ledger.finished_tasks.add(task.id)
+                ledger.pending_tasks.discard(task.id)
+            elif task.status == "NOT_STARTED" and task.type != "PROGRESS_TARGET":
+                logger.info(f"{self.session_name} | Started doing task <ly>{task.title}</ly>")
+                await self.start_task(http_client=self.http_client, task_id=task.id)
+                ledger.pending_tasks.add(task.id)
+                started = True
+                await dispatcher.pause(0.5)
+
+        # Only a list with freshly started tasks is worth downloading again
+        if started:
+            await dispatcher.pause(5)
+            tasks = await self.get_tasks(http_client=self.http_client) or tasks
+
+        for task in tasks:
+            if task.id in ledger.finished_tasks:
+                continue
+
+            if task.status:
+                if task.status == "READY_FOR_CLAIM" and task.type != 'PROGRESS_TASK':
+                    status = await self.claim_task(http_client=self.http_client, task_id=task.id)
+                    if status:
+                        ledger.finished_tasks.add(task.id)
+                        ledger.pending_tasks.discard(task.id)
+                        logger.success(f"{self.session_name} | Claimed task <ly>{task.title}</ly>")
+                    await dispatcher.pause(0.5)
+
+                elif task.status == "READY_FOR_VERIFY" and task.validation_type == 'KEYWORD':
+                    status = await self.validate_task(http_client=self.http_client, task_id=task.id,
+                                                      title=task.title)
+                    if status:
+                        ledger.finished_tasks.add(task.id)
+                        ledger.pending_tasks.discard(task.id)
+                        logger.success(f"{self.session_name} | Confirmed task <ly>{task.title}</ly>")
+
+        if tasks:
+            ledger.tasks_checked_at = ledger.server_time()
+
+    async def phase_farming(self) -> None:
+        await dispatcher.pause(random.uniform(1, 3))
+
+        try:
+            if self.ledger.farming_end is None:
+                await self.balance(http_client=self.http_client)
+
+            farming_end = self.ledger.farming_end
+            if farming_end is None:
+                return
+
+            if farming_end > 0:
+                if self.ledger.server_time() < farming_end:
+                    return
+
+                result = await self.claim(http_client=self.http_client)
+                if result is None:
+                    self.ledger.farming_end = None
+                    return
+
+                timestamp, balance = result
+                self.ledger.sync_clock(timestamp)
+                logger.info(f"{self.session_name} | Claimed reward! Balance: <green>{balance}</green> BP")
+
+            await self.start(http_client=self.http_client)
+            logger.info(f"{self.session_name} | Start farming!")
+
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            raise
+        except Exception as e:
+            logger.info(f"{self.session_name} | Error in farming management: {e}")
+
+    def report_traffic(self, before: tuple[float, float]) -> None:
+        sent, received = (after - start for after, start in zip(session_traffic(self.session_name), before))
+        if not sent and not received:
+            return
+        metrics.observe('cycle_bytes', sent + received, buckets=BYTE_BUCKETS)
+        logger.info(f"{self.session_name} | Cycle traffic: <cyan>{received / 1024:.1f} KB</cyan> received, "
+                    f"<cyan>{sent / 1024:.1f} KB</cyan> sent")
+
+    async def run_cycle(self) -> None:
+        phases = {
+            'login': self.phase_login,
+            'balance': self.phase_balance,
+            'daily_reward': self.phase_daily_reward,
+            'friends': self.phase_friends,
+            'games': self.phase_games,
+            'tribe': self.phase_tribe,
+            'tasks': self.phase_tasks,
+            'farming': self.phase_farming,
+        }
+
+        plan = plan_cycle(self.ledger, first_cycle=not self.balance_logged)
+        logger.debug(f"{self.session_name} | Cycle plan: {', '.join(plan) or 'nothing due'}")
+
+        cycle_started = monotonic()
+        deadline = cycle_started + settings.CYCLE_DEADLINE if settings.CYCLE_DEADLINE else None
+        token = cycle_deadline.set(deadline)
+        traffic = session_traffic(self.session_name)
+        try:
+            for phase in plan:
+                # Games are paced by their own sleeps, so only per-request timeouts bound them
+                cycle_deadline.set(None if phase == 'games' else deadline)
+                # The slot is given back between phases, so a backlog of long phases cannot hold up urgent claims
+                async with dispatcher.slot(self.proxy, PHASE_PRIORITY[phase]):
+                    await self.enter_phase(phase)
+                    started = perf_counter()
+                    try:
+                        await phases[phase]()
+                    except Exception as error:
+                        metrics.inc('cycle_errors_total', phase=phase, error=type(error).__name__)
+                        raise
+                    finally:
+                        metrics.observe('phase_seconds', perf_counter() - started, phase=phase)
+        finally:
+            cycle_deadline.reset(token)
+            self.report_traffic(traffic)
+            fleet.record_cycle(self.session_name, monotonic() - cycle_started)
+
+        metrics.inc('cycles_total')
+
     async def run(self) -> None:
-        if settings.USE_RANDOM_DELAY_IN_RUN:
+        restored = schedule.entries.get(self.session_name) if settings.WARM_RESTART else None
+        if restored is not None:
+            if restored.next_due > time():
+                self.phase = 'sleep'
+                self.wake_at = restored.next_due
+                logger.info(f"{self.session_name} | Resuming the saved schedule, next cycle in "
+                            f"<y>{int(restored.next_due - time())}s</y>")
+                await asyncio.sleep(restored.next_due - time())
+        elif settings.USE_RANDOM_DELAY_IN_RUN:
             random_delay = random.randint(settings.RANDOM_DELAY_IN_RUN[0], settings.RANDOM_DELAY_IN_RUN[1])
             logger.info(f"{self.session_name} | The Bot will go live in <y>{random_delay}s</y>")
             await asyncio.sleep(random_delay)
 
         await self.init()
 
-        access_token = None
-        refresh_token = None
-        login_need = True
-
-        proxy_conn = ProxyConnector().from_url(self.proxy) if self.proxy else None
-        http_client = CloudflareScraper(headers=self.headers, connector=proxy_conn)
-        connection_manager.add(http_client)
+        self.open_http_client()
 
         if settings.USE_PROXY:
             if not self.proxy:
                 logger.error(f"{self.session_name} | Proxy is not set. Aborting operation.")
                 return
-            if not await self.check_proxy(http_client):
+            if not await self.check_proxy(self.http_client):
                 logger.error(f"{self.session_name} | Proxy check failed. Aborting operation.")
-                return        
+                return
 
         while True:
+            status = 'ok'
             try:
-                if http_client.closed:
-                    if proxy_conn:
-                        if not proxy_conn.closed:
-                            await proxy_conn.close()
-
-                    proxy_conn = ProxyConnector().from_url(self.proxy) if self.proxy else None
-                    http_client = CloudflareScraper(headers=self.headers, connector=proxy_conn)
-                    connection_manager.add(http_client)
-
-                if login_need:
-                    if "Authorization" in http_client.headers:
-                        del http_client.headers["Authorization"]
-
-                    init_data = await self.get_tg_web_data()
-
-                    access_token, refresh_token = await self.login(http_client=http_client, initdata=init_data)
-
-                    http_client.headers["Authorization"] = f"Bearer {access_token}"
-                    self.headers["Authorization"] = f"Bearer {access_token}"
-
-                    if self.first_run is not True:
-                        logger.success(f"{self.session_name} | Logged in successfully")
-                        self.first_run = True
-
-                    login_need = False
-
-                timestamp, start_time, end_time, play_passes = await self.balance(http_client=http_client)
-                balance = await self.wallet(http_client)
-
-                if balance is not None:
-                    logger.info(f"{self.session_name} | Balance: <green>{balance:,.0f}</green> BP | You have <ly>{play_passes}</ly> play passes")
-
-                msg = await self.claim_daily_reward(http_client=http_client)
-                if isinstance(msg, bool) and msg:
-                    logger.success(f"{self.session_name} | Claimed daily reward!")
-
-                claim_amount, is_available = await self.friend_balance(http_client=http_client)
-
-                if claim_amount != 0 and is_available:
-                    amount = await self.friend_claim(http_client=http_client)
-                    logger.success(f"{self.session_name} | Claimed friend ref reward <cyan>{amount}</cyan>")
-
-                if play_passes and play_passes > 0 and settings.PLAY_GAMES is True:
-                    await self.play_game(http_client=http_client, play_passes=play_passes, refresh_token=refresh_token)
-
-                tribe_id, title = await self.my_tribe(http_client=http_client)
-                await asyncio.sleep(random.randint(5, 15))
-
-                # if tribe_id == '':
-                #     await self.leave_tribe(http_client=http_client)
-                #     await asyncio.sleep(random.randint(10, 45))
-                #     await self.join_tribe(http_client=http_client)
-
-                await asyncio.sleep(random.randint(10, 45))
-
-                if settings.TASKS is True:
-                    tasks = await self.get_tasks(http_client=http_client)
+                if self.http_client is None or self.http_client.closed:
+                    await self.close_http_client()
+                    self.open_http_client()
 
-                    for task in tasks:
-                        if task.get('status') == "NOT_STARTED" and task.get('type') != "PROGRESS_TARGET":
-                            logger.info(f"{self.session_name} | Started doing task <ly>{task['title']}</ly>")
-                            await self.start_task(http_client=http_client, task_id=task["id"])
-                            await asyncio.sleep(0.5)
-
-                    await asyncio.sleep(5)
-
-                    tasks = await self.get_tasks(http_client=http_client)
-
-                    for task in tasks:
-                        if task.get('status'):
-                            if task['status'] == "READY_FOR_CLAIM" and task['type'] != 'PROGRESS_TASK':
-                                status = await self.claim_task(http_client=http_client, task_id=task["id"])
-                                if status:
-                                    logger.success(f"{self.session_name} | Claimed task <ly>{task['title']}</ly>")
-                                await asyncio.sleep(0.5)
-
-                            elif task['status'] == "READY_FOR_VERIFY" and task['validationType'] == 'KEYWORD':
-                                status = await self.validate_task(http_client=http_client, task_id=task["id"],
-                                                                  title=task['title'])
-                                if status:
-                                    logger.success(f"{self.session_name} | Confirmed task <ly>{task['title']}</ly>")
-                else:
-                    logger.info(f"{self.session_name} | TASKS setting is disabled, skipping task execution.")
-
-                await asyncio.sleep(random.uniform(1, 3))
-
-                try:
-                    timestamp, start_time, end_time, play_passes = await self.balance(http_client=http_client)
-
-                    if start_time is None and end_time is None:
-                        await self.start(http_client=http_client)
-                        logger.info(f"{self.session_name} | Start farming!")
-
-                    elif (start_time is not None and end_time is not None and timestamp is not None and
-                          timestamp >= end_time):
-                        timestamp, balance = await self.claim(http_client=http_client)
-                        logger.info(f"{self.session_name} | Claimed reward!")
-
-                except Exception as e:
-                    logger.info(f"{self.session_name} | Error in farming management: {e}")
+                await self.run_cycle()
 
             except aiohttp.ClientConnectorError as error:
                 delay = random.randint(1800, 3600)
                 logger.error(f"{self.session_name} | Connection error: {error}. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
 
             except aiohttp.ServerDisconnectedError as error:
                 delay = random.randint(900, 1800)
                 logger.error(f"{self.session_name} | Server disconnected: {error}. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
 
             except aiohttp.ClientResponseError as error:
@@ -849,21 +1177,35 @@ class Tapper:
                 logger.error(
                    f"{self.session_name} | HTTP response error: {error}. Status: {error.status}. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
 
             except aiohttp.ClientError as error:
                 delay = random.randint(3600, 7200)
                 logger.error(f"{self.session_name} | HTTP client error: {error}. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
 
-            except asyncio.TimeoutError:
+            except DeadlineExceeded as error:
+                logger.warning(f"{self.session_name} | Cycle deadline exceeded: {error}. Unfinished actions move to the next cycle.")
+                status = 'deadline'
+
+            except asyncio.TimeoutError as error:
                 delay = random.randint(7200, 14400)
                 logger.error(f"{self.session_name} | Request timed out. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
+
+
+            except AuthorizationFailed as error:
+                delay = random.randint(300, 900)
+                logger.error(f"{self.session_name} | Telegram authorization failed. Retrying in {delay} seconds.")
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
 
             except InvalidSession as error:
@@ -876,35 +1218,59 @@ class Tapper:
                 delay = random.randint(1800, 3600)
                 logger.error(f"{self.session_name} | JSON decode error: {error}. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
             except KeyError as error:
                 delay = random.randint(1800, 3600)
                 logger.error(
                     f"{self.session_name} | Key error: {error}. Possible API response change. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
 
             except Exception as error:
                 delay = random.randint(7200, 14400)
                 logger.error(f"{self.session_name} | Unexpected error: {error}. Retrying in {delay} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                status = type(error).__name__
+                await self.backoff(delay, status)
 
             finally:
-                await http_client.close()
-                if proxy_conn:
-                    if not proxy_conn.closed:
-                        await proxy_conn.close()
-                connection_manager.remove(http_client)
+                await self.close_http_client()
+                await self.ledger.save()
+
+            next_claim = random.randint(settings.SLEEP_TIME[0], settings.SLEEP_TIME[1])
+            hours = int(next_claim // 3600)
+            minutes = (int(next_claim % 3600)) // 60
+            logger.info(
+                f"{self.session_name} | Sleep before wake up <yellow>{hours} hours</yellow> and <yellow>{minutes} minutes</yellow>")
+            await self.sleep(next_claim, status)
+
 
-                next_claim = random.randint(settings.SLEEP_TIME[0], settings.SLEEP_TIME[1])
-                hours = int(next_claim // 3600)
-                minutes = (int(next_claim % 3600)) // 60
-                logger.info(
-                    f"{self.session_name} | Sleep before wake up <yellow>{hours} hours</yellow> and <yellow>{minutes} minutes</yellow>")
-                await asyncio.sleep(next_claim)
+def extract_tg_web_data(auth_url: str) -> str:
+    return unquote(string=auth_url.split('tgWebAppData=', maxsplit=1)[1].split('&tgWebAppVersion', maxsplit=1)[0])
+
+
+def create_tg_client(session_name: str, proxy: dict | None = None) -> Client:
+    return Client(
+        name=session_name,
+        api_id=settings.API_ID,
+        api_hash=settings.API_HASH,
+        workdir="sessions/",
+        plugins=dict(root="bot/plugins"),
+        proxy=proxy
+    )
+
+
+def token_expires_at(token: str | None) -> float:
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return codec.loads(base64.urlsafe_b64decode(payload)).get('exp', 0)
+    except Exception:
+        return 0
 
 
 async def run_tapper(tg_client: Client, proxy: str | None):
@@ -912,7 +1278,13 @@ async def run_tapper(tg_client: Client, proxy: str | None):
     if settings.USE_PROXY and not proxy:
         logger.error(f"{session_name} | No proxy found for this session")
         return
+    tapper = Tapper(tg_client=tg_client, proxy=proxy)
+    fleet.register(tapper)
+    quarantined = False
     try:
-        await Tapper(tg_client=tg_client, proxy=proxy).run()
+        await tapper.run()
     except InvalidSession:
+        quarantined = True
         logger.error(f"{session_name} | Invalid Session")
+    finally:
+        fleet.unregister(session_name, quarantined)
@@ -0,0 +1,182 @@
+from typing import NamedTuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from bot.utils.json_codec import codec
+
+TASK_FIELDS = {'id': 'id', 'status': 'status', 'type': 'type', 'title': 'title', 'validationType': 'validation_type'}
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Below this, decoding the whole body at once is several times cheaper than walking parse events
+STREAM_THRESHOLD = 512 * 1024
+
+
+class TaskRecord(NamedTuple):
+    id: str
+    status: str | None
+    type: str | None
+    title: str | None
+    validation_type: str | None
+
+
+def to_record(task: dict) -> TaskRecord:
+    return TaskRecord(task.get('id'), task.get('status'), task.get('type'), task.get('title'),
+                      task.get('validationType'))
+
+
+def collect_tasks(resp_json) -> list[TaskRecord]:
+    collected_tasks = []
+    for task in resp_json:
+        if task.get('sectionType') == 'HIGHLIGHTS':
+            tasks_list = task.get('tasks', [])
+            for t in tasks_list:
+                sub_tasks = t.get('subTasks')
+                if sub_tasks:
+                    for sub_task in sub_tasks:
+                        collected_tasks.append(to_record(sub_task))
+                if t.get('type') != 'PARTNER_INTEGRATION':
+                    collected_tasks.append(to_record(t))
+
+        if task.get('sectionType') == 'WEEKLY_ROUTINE':
+            tasks_list = task.get('tasks', [])
+            for t in tasks_list:
+                sub_tasks = t.get('subTasks', [])
+                for sub_task in sub_tasks:
+                    collected_tasks.append(to_record(sub_task))
+
+        if task.get('sectionType') == "DEFAULT":
+            sub_tasks = task.get('subSections', [])
+            for sub_task in sub_tasks:
+                tasks = sub_task.get('tasks', [])
+                for task_basic in tasks:
+                    collected_tasks.append(to_record(task_basic))
+
+    return collected_tasks
+
+
+HIGHLIGHT_TASK = 'item.tasks.item'
+SUB_TASK = 'item.tasks.item.subTasks.item'
+DEFAULT_TASK = 'item.subSections.item.tasks.item'
+
+# ijson prefix of every scalar we keep -> (which record it belongs to, field)
+TARGETS = {
+    'item.sectionType': ('section', None),
+    **{f"{HIGHLIGHT_TASK}.{key}": ('task', field) for key, field in TASK_FIELDS.items()},
+    **{f"{DEFAULT_TASK}.{key}": ('task', field) for key, field in TASK_FIELDS.items()},
+    **{f"{SUB_TASK}.{key}": ('sub_task', field) for key, field in TASK_FIELDS.items()},
+}
+
+EMPTY_RECORD = dict.fromkeys(TaskRecord._fields)
+
+
+class TaskCollector:
+    """Builds the same records as collect_tasks from ijson parse events, keeping only the task fields.
+
+    Key order inside a section is not guaranteed, so a section's tasks are held until its sectionType is known.
+    """
+
+    def __init__(self):
+        self.collected_tasks: list[TaskRecord] = []
+        self.section_type = None
+        self.section_tasks = []
+        self.default_tasks = []
+        self.sub_tasks = []
+        self.fields = {}
+        self.sub_fields = {}
+
+    def feed(self, prefix: str, event: str, value) -> None:
+        if event == 'end_map':
+            if prefix == SUB_TASK:
+                self.sub_tasks.append(TaskRecord(**{**EMPTY_RECORD, **self.sub_fields}))
+                self.sub_fields = {}
+            elif prefix == HIGHLIGHT_TASK:
+                self.section_tasks.append((TaskRecord(**{**EMPTY_RECORD, **self.fields}), self.sub_tasks))
+                self.fields = {}
+                self.sub_tasks = []
+            elif prefix == DEFAULT_TASK:
+                self.default_tasks.append(TaskRecord(**{**EMPTY_RECORD, **self.fields}))
+                self.fields = {}
+            elif prefix == 'item':
+                self.end_section()
+            return
+
+        target = TARGETS.get(prefix)
+        if target is None:
+            return
+
+        kind, field = target
+        if kind == 'task':
+            self.fields[field] = value
+        elif kind == 'sub_task':
+            self.sub_fields[field] = value
+        else:
+            self.section_type = value
+
+    def end_section(self) -> None:
+        if self.section_type == 'HIGHLIGHTS':
+            for task, sub_tasks in self.section_tasks:
+                self.collected_tasks.extend(sub_tasks)
+                if task.type != 'PARTNER_INTEGRATION':
+                    self.collected_tasks.append(task)
+        elif self.section_type == 'WEEKLY_ROUTINE':
+            for task, sub_tasks in self.section_tasks:
+                self.collected_tasks.extend(sub_tasks)
+        elif self.section_type == 'DEFAULT':
+            self.collected_tasks.extend(self.default_tasks)
+
+        self.section_type = None
+        self.section_tasks = []
+        self.default_tasks = []
+
+
+def parse_tasks(body: bytes) -> list[TaskRecord]:
+    if ijson is None:
+        return collect_tasks(codec.loads(body))
+
+    collector = TaskCollector()
+    for prefix, event, value in ijson.parse(body):
+        collector.feed(prefix, event, value)
+    return collector.collected_tasks
+
+
+class PrefixedReader:
+    """The bytes already read off a stream, then the rest of the stream."""
+
+    __slots__ = ('head', 'offset', 'stream')
+
+    def __init__(self, head: bytes, stream):
+        self.head = head
+        self.offset = 0
+        self.stream = stream
+
+    async def read(self, n: int = -1) -> bytes:
+        if self.offset < len(self.head):
+            # Parsers read into a fixed buffer, so never hand back more than asked for
+            end = len(self.head) if n < 0 else self.offset + n
+            chunk = self.head[self.offset:end]
+            self.offset += len(chunk)
+            return chunk
+        return await self.stream.read(n)
+
+
+async def read_tasks(resp) -> list[TaskRecord]:
+    if ijson is None or (resp.content_length is not None and resp.content_length <= STREAM_THRESHOLD):
+        return collect_tasks(codec.loads(await resp.read()))
+
+    # Chunked and compressed bodies carry no usable length; what decides is how much actually arrives
+    head = bytearray()
+    while len(head) <= STREAM_THRESHOLD:
+        chunk = await resp.content.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return collect_tasks(codec.loads(head))
+        head += chunk
+
+    # Only really large lists are parsed as they arrive, yielding to the loop between chunks
+    collector = TaskCollector()
+    reader = PrefixedReader(bytes(head), resp.content)
+    async for prefix, event, value in ijson.parse_async(reader, buf_size=STREAM_CHUNK_SIZE):
+        collector.feed(prefix, event, value)
+    return collector.collected_tasks
@@ -0,0 +1,55 @@
+from time import monotonic
+
+from pyrogram.errors import FloodWait
+
+from bot.config import settings
+from bot.core.dispatcher import dispatcher
+from bot.utils.logger import logger
+from bot.utils.metrics import metrics
+
+MAX_FLOOD_WAITS = 3
+
+
+class TelegramScheduler:
+    """Paces MTProto requests of all sessions through one queue.
+
+    Slots are handed out in arrival order, spaced by the global rate and by the rate of the request's DC.
+    """
+
+    def __init__(self):
+        self.next_slot = 0.0
+        self.next_dc_slot: dict[int, float] = {}
+
+    def reserve(self, dc_id: int | None) -> float:
+        now = monotonic()
+        slot = max(now, self.next_slot, self.next_dc_slot.get(dc_id, 0.0))
+        # A rate of 0 or less means no cap, as with the other rate settings
+        if settings.TG_GLOBAL_RATE > 0:
+            self.next_slot = slot + 1 / settings.TG_GLOBAL_RATE
+        if dc_id is not None and settings.TG_DC_RATE > 0:
+            self.next_dc_slot[dc_id] = slot + 1 / settings.TG_DC_RATE
+        return slot - now
+
+    async def call(self, session_name: str, dc_id: int | None, func, *args, **kwargs):
+        flood_waits = 0
+        while True:
+            delay = self.reserve(dc_id)
+            metrics.observe('telegram_queue_seconds', delay)
+            if delay > 0:
+                await dispatcher.pause(delay)
+
+            metrics.inc('telegram_requests_total', dc=dc_id or 0)
+            try:
+                return await func(*args, **kwargs)
+            except FloodWait as error:
+                flood_waits += 1
+                metrics.inc('telegram_flood_waits_total', dc=dc_id or 0)
+                if flood_waits > MAX_FLOOD_WAITS:
+                    raise
+
+                # Only this session waits; everyone else keeps their place in the queue
+                logger.warning(f"{session_name} | Telegram FloodWait, retrying in <ly>{error.value}s</ly>")
+                await dispatcher.pause(error.value)
+
+
+tg_scheduler = TelegramScheduler()
@@ -0,0 +1,232 @@
+import asyncio
+import ssl
+import zlib
+from functools import cache
+from urllib.parse import urlencode
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+try:
+    import httpcore
+except ImportError:
+    httpcore = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from bot.core.cassette import ReplayResponse
+from bot.utils.json_codec import codec
+from bot.utils.logger import logger
+from bot.utils.metrics import metrics
+
+HTTP_TRANSPORTS = ('aiohttp', 'h2')
+
+# Connection-specific headers are not allowed in HTTP/2; Host becomes :authority
+HOP_BY_HOP = frozenset(['connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade', 'host'])
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Only what decode_body can undo is advertised; aiohttp picks its own list the same way
+ACCEPT_ENCODING = ', '.join(['gzip', 'deflate'] + ['br'] * (brotli is not None) + ['zstd'] * (zstandard is not None))
+
+
+@cache
+def transport_available(name: str) -> bool:
+    if name not in HTTP_TRANSPORTS:
+        raise ValueError(f"Unknown HTTP transport '{name}', expected one of: {', '.join(HTTP_TRANSPORTS)}")
+    if name == 'h2' and httpcore is None:
+        logger.warning("HTTP_TRANSPORT 'h2' needs pip install 'httpcore[asyncio,http2,socks]', using aiohttp")
+        return False
+    return True
+
+
+def covers(names: tuple[str, ...], host: str) -> bool:
+    host = host.lower()
+    for name in names:
+        name = name.lower()
+        if name == host or (name.startswith('*.') and '.' in host and host.split('.', 1)[1] == name[2:]):
+            return True
+    return False
+
+
+def decode_body(body: bytes, encoding: str) -> bytes:
+    encoding = encoding.strip().lower()
+    if not body or encoding in ('', 'identity'):
+        return body
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == 'br' and brotli is not None:
+        return brotli.decompress(body)
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise aiohttp.ClientPayloadError(f"Can not decode content-encoding: {encoding}")
+
+
+class H2Response(ReplayResponse):
+    __slots__ = ('wire_bytes',)
+
+    def __init__(self, method: str, url: URL, status: int, headers: CIMultiDict, body: bytes, wire_bytes: int):
+        super().__init__(method, url, status, '', body)
+        self.headers = CIMultiDictProxy(headers)
+        # Body as received plus uncompressed headers; HPACK makes the real figure somewhat smaller
+        self.wire_bytes = wire_bytes
+
+
+class ResolvingBackend(httpcore.AsyncNetworkBackend if httpcore else object):
+    """Connects through the shared DNS cache instead of resolving on every new connection."""
+
+    def __init__(self, resolver: AbstractResolver):
+        self.resolver = resolver
+        self.inner = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: float | None = None, local_address: str | None = None,
+                          socket_options=None):
+        metrics.inc('h2_connections_total', host=host)
+        error = None
+        for record in await self.resolver.resolve(host, port, family=0):
+            try:
+                return await self.inner.connect_tcp(record['host'], port, timeout=timeout,
+                                                    local_address=local_address, socket_options=socket_options)
+            except httpcore.ConnectError as connect_error:
+                error = connect_error
+        raise error or httpcore.ConnectError(f"{host} did not resolve")
+
+    async def connect_unix_socket(self, path: str, timeout: float | None = None, socket_options=None):
+        return await self.inner.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.inner.sleep(seconds)
+
+
+class H2Transport:
+    """Sends a session's requests over HTTP/2 with httpcore, one multiplexed connection per origin.
+
+    Once an HTTP/2 connection has been verified for one host, requests for other hosts named in its
+    certificate that resolve to the same address reuse it (RFC 9113 9.1.1), with the original name as :authority.
+    """
+
+    def __init__(self, proxy: str | None = None, resolver: AbstractResolver | None = None,
+                 ssl_context: ssl.SSLContext | None = None):
+        self.resolver = resolver or DefaultResolver()
+        # Coalescing trusts the certificate's names, so verification is always on here
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.certified: dict[str, tuple[str, ...]] = {}
+        self.aliases: dict[str, str] = {}
+        self.pool = httpcore.AsyncConnectionPool(ssl_context=self.ssl_context, proxy=self.make_proxy(proxy),
+                                                 http1=True, http2=True,
+                                                 network_backend=ResolvingBackend(self.resolver))
+
+    @staticmethod
+    def make_proxy(proxy: str | None):
+        if not proxy:
+            return None
+        url = URL(proxy)
+        auth = (url.user, url.password or '') if url.user else None
+        return httpcore.Proxy(str(url.with_user(None)), auth=auth)
+
+    async def addresses(self, host: str) -> set[str]:
+        try:
+            return {record['host'] for record in await self.resolver.resolve(host, 443, family=0)}
+        except OSError:
+            return set()
+
+    async def route(self, url: URL) -> str:
+        host = url.host
+        if url.scheme != 'https' or host in self.certified:
+            return host
+        alias = self.aliases.get(host)
+        if alias is not None:
+            return alias
+
+        for origin, names in self.certified.items():
+            if covers(names, host) and (await self.addresses(host)) & (await self.addresses(origin)):
+                self.aliases[host] = origin
+                logger.debug(f"HTTP/2 | {host} shares the connection to {origin}")
+                return origin
+        return host
+
+    def learn(self, host: str, extensions: dict) -> None:
+        if host in self.certified or extensions.get('http_version') != b'HTTP/2':
+            return
+        stream = extensions.get('network_stream')
+        ssl_object = stream.get_extra_info('ssl_object') if stream is not None else None
+        cert = ssl_object.getpeercert() if ssl_object is not None else None
+        if cert:
+            self.certified[host] = tuple(value for kind, value in cert.get('subjectAltName', ()) if kind == 'DNS')
+
+    def build(self, session: aiohttp.ClientSession, method: str, url: URL, kwargs: dict) -> tuple[list, bytes]:
+        headers = CIMultiDict(session.headers)
+        headers.update(kwargs.get('headers') or {})
+        headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+
+        body = b''
+        if kwargs.get('json') is not None:
+            body = codec.dumps(kwargs['json']).encode()
+            headers.setdefault('Content-Type', 'application/json')
+        elif kwargs.get('data') is not None:
+            data = kwargs['data']
+            if isinstance(data, dict):
+                data = urlencode(data)
+                headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+            body = data.encode() if isinstance(data, str) else bytes(data)
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            headers['Content-Length'] = str(len(body))
+
+        authority = url.host if url.port == DEFAULT_PORTS.get(url.scheme) else f"{url.host}:{url.port}"
+        return [('Host', authority)] + [(key, value) for key, value in headers.items()
+                                        if key.lower() not in HOP_BY_HOP], body
+
+    async def request(self, session: aiohttp.ClientSession, method: str, url, **kwargs) -> H2Response:
+        method = method.upper()
+        url = URL(url)
+        if kwargs.get('params'):
+            url = url.extend_query(kwargs['params'])
+        headers, body = self.build(session, method, url, kwargs)
+
+        target = await self.route(url)
+        if target != url.host:
+            metrics.inc('h2_coalesced_requests_total', host=url.host)
+
+        timeout = kwargs.get('timeout')
+        total = timeout.total if isinstance(timeout, aiohttp.ClientTimeout) else session.timeout.total
+        try:
+            async with asyncio.timeout(total):
+                response = await self.pool.request(method, str(url.with_host(target)), headers=headers, content=body)
+        except httpcore.TimeoutException as error:
+            raise asyncio.TimeoutError(str(error)) from error
+        except httpcore.RemoteProtocolError as error:
+            raise aiohttp.ServerDisconnectedError(str(error)) from error
+        except (httpcore.NetworkError, httpcore.ProxyError, httpcore.ProtocolError) as error:
+            raise aiohttp.ClientConnectionError(str(error) or type(error).__name__) from error
+
+        self.learn(target, response.extensions)
+        response_headers = CIMultiDict((key.decode('latin-1'), value.decode('latin-1'))
+                                       for key, value in response.headers)
+        content = decode_body(response.content, response_headers.get('Content-Encoding', ''))
+        wire_bytes = len(response.content) + sum(len(key) + len(value) for key, value in response.headers)
+        return H2Response(method, url, response.status, response_headers, content, wire_bytes)
+
+    async def close(self) -> None:
+        await self.pool.aclose()
+
+
+def create_transport(name: str, proxy: str | None = None, resolver: AbstractResolver | None = None,
+                     ssl_context: ssl.SSLContext | None = None) -> H2Transport | None:
+    # None leaves the requests to aiohttp itself
+    if name == 'aiohttp' or not transport_available(name):
+        return None
+    return H2Transport(proxy=proxy, resolver=resolver, ssl_context=ssl_context)
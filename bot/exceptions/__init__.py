@@ -1,2 +1,13 @@
+import asyncio
+
+
 class InvalidSession(BaseException):
     ...
+
+
+class AuthorizationFailed(Exception):
+    ...
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    ...
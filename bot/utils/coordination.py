@@ -0,0 +1,200 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from time import time
+from typing import Callable
+
+from bot.utils.logger import logger
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseBackend(ABC):
+    @abstractmethod
+    def heartbeat(self, node_id: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def leave(self, node_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def live_nodes(self) -> list[str]:
+        ...
+
+    @abstractmethod
+    def acquire(self, session: str, node_id: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    def renew(self, node_id: str, sessions: list[str], ttl: float) -> set[str]:
+        ...
+
+    @abstractmethod
+    def release(self, node_id: str, sessions: list[str]) -> None:
+        ...
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Lease table in a SQLite file, usually on storage shared by all nodes.
+
+    Expiry is compared against each node's wall clock, so node clocks must be kept in sync (NTP).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS nodes (node_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS leases "
+                       "(session TEXT PRIMARY KEY, node_id TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def heartbeat(self, node_id: str, ttl: float) -> None:
+        now = time()
+        with self._connect() as db:
+            db.execute("INSERT INTO nodes (node_id, expires_at) VALUES (?, ?) "
+                       "ON CONFLICT(node_id) DO UPDATE SET expires_at = excluded.expires_at", (node_id, now + ttl))
+            db.execute("DELETE FROM nodes WHERE expires_at <= ?", (now,))
+
+    def leave(self, node_id: str) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM nodes WHERE node_id = ?", (node_id,))
+
+    def live_nodes(self) -> list[str]:
+        with self._connect() as db:
+            rows = db.execute("SELECT node_id FROM nodes WHERE expires_at > ?", (time(),)).fetchall()
+        return [row[0] for row in rows]
+
+    def acquire(self, session: str, node_id: str, ttl: float) -> bool:
+        now = time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT node_id, expires_at FROM leases WHERE session = ?", (session,)).fetchone()
+                if row is not None and row[0] != node_id and row[1] > now:
+                    return False
+                db.execute("INSERT INTO leases (session, node_id, expires_at) VALUES (?, ?, ?) "
+                           "ON CONFLICT(session) DO UPDATE SET node_id = excluded.node_id, "
+                           "expires_at = excluded.expires_at", (session, node_id, now + ttl))
+                db.execute("COMMIT")
+                return True
+            finally:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+
+    def renew(self, node_id: str, sessions: list[str], ttl: float) -> set[str]:
+        if not sessions:
+            return set()
+
+        now = time()
+        placeholders = ', '.join('?' * len(sessions))
+        with self._connect() as db:
+            db.execute(f"UPDATE leases SET expires_at = ? WHERE node_id = ? AND expires_at > ? "
+                       f"AND session IN ({placeholders})", (now + ttl, node_id, now, *sessions))
+            rows = db.execute(f"SELECT session FROM leases WHERE node_id = ? AND expires_at > ? "
+                              f"AND session IN ({placeholders})", (node_id, now, *sessions)).fetchall()
+        return {row[0] for row in rows}
+
+    def release(self, node_id: str, sessions: list[str]) -> None:
+        if not sessions:
+            return
+
+        placeholders = ', '.join('?' * len(sessions))
+        with self._connect() as db:
+            db.execute(f"DELETE FROM leases WHERE node_id = ? AND session IN ({placeholders})",
+                       (node_id, *sessions))
+
+
+class SessionCoordinator:
+    def __init__(self, backend: LeaseBackend, node_id: str, sessions: list[str],
+                 start: Callable[[str], asyncio.Task], ttl: float = 60):
+        self.backend = backend
+        self.node_id = node_id
+        self.sessions = sessions
+        self.start = start
+        self.ttl = ttl
+        self.interval = ttl / 3
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.valid_until = 0.0
+
+    @staticmethod
+    def preferred_node(session: str, nodes: list[str]) -> str:
+        # Rendezvous hashing: every node computes the same owner without talking to the others
+        return max(nodes, key=lambda node: zlib.crc32(f"{node}/{session}".encode()))
+
+    async def stop(self, sessions: list[str], release: bool) -> None:
+        tasks = [self.tasks.pop(session) for session in sessions if session in self.tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if release:
+            await asyncio.to_thread(self.backend.release, self.node_id, sessions)
+
+    async def step(self) -> None:
+        now = time()
+        await asyncio.to_thread(self.backend.heartbeat, self.node_id, self.ttl)
+        held = await asyncio.to_thread(self.backend.renew, self.node_id, list(self.tasks), self.ttl)
+        self.valid_until = now + self.ttl
+
+        lost = [session for session in self.tasks if session not in held]
+        if lost:
+            logger.warning(f"Node {self.node_id} | Lost leases for <ly>{len(lost)}</ly> sessions, stopping them")
+            await self.stop(lost, release=False)
+
+        live = await asyncio.to_thread(self.backend.live_nodes)
+        if self.node_id not in live:
+            live.append(self.node_id)
+
+        handoff = [session for session in self.tasks if self.preferred_node(session, live) != self.node_id]
+        if handoff:
+            logger.info(f"Node {self.node_id} | Handing over <ly>{len(handoff)}</ly> sessions to other nodes")
+            await self.stop(handoff, release=True)
+
+        acquired = 0
+        for session in self.sessions:
+            if session in self.tasks or self.preferred_node(session, live) != self.node_id:
+                continue
+            if await asyncio.to_thread(self.backend.acquire, session, self.node_id, self.ttl):
+                self.tasks[session] = self.start(session)
+                acquired += 1
+
+        if acquired:
+            logger.info(f"Node {self.node_id} | Acquired <ly>{acquired}</ly> sessions, "
+                        f"running <ly>{len(self.tasks)}</ly> of {len(self.sessions)} across {len(live)} nodes")
+
+    async def run(self) -> None:
+        logger.info(f"Node {self.node_id} | Joining coordination with lease TTL <ly>{self.ttl}s</ly>")
+        try:
+            while True:
+                try:
+                    await self.step()
+                except Exception as e:
+                    logger.error(f"Node {self.node_id} | Coordination error: {e}")
+                    # Without a renewed lease another node may take over: stop before ours expires
+                    if self.tasks and time() >= self.valid_until - self.interval:
+                        logger.warning(f"Node {self.node_id} | Leases can't be renewed, stopping all sessions")
+                        await self.stop(list(self.tasks), release=False)
+
+                await asyncio.sleep(self.interval)
+        finally:
+            sessions = list(self.tasks)
+            await self.stop(sessions, release=False)
+            try:
+                await asyncio.to_thread(self.backend.release, self.node_id, sessions)
+                await asyncio.to_thread(self.backend.leave, self.node_id)
+            except Exception as e:
+                logger.error(f"Node {self.node_id} | Error releasing leases: {e}")
@@ -0,0 +1,141 @@
+import asyncio
+from collections import Counter, deque
+from heapq import nlargest, nsmallest
+from time import monotonic, perf_counter, time
+
+from rich import box
+from rich.console import Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+
+from bot.config import settings
+from bot.core.fleet import fleet
+from bot.core.schedule import schedule
+from bot.utils.logger import logger, console_filter
+from bot.utils.metrics import metrics
+
+STATES = ('sleeping', 'authing', 'in phase', 'backing off', 'quarantined')
+STATE_OF_PHASE = {None: 'sleeping', 'sleep': 'sleeping', 'authing': 'authing', 'login': 'authing',
+                  'backoff': 'backing off'}
+RATE_WINDOW = 10
+ERROR_WINDOW = 60
+QUEUE_ROWS = 8
+SLOWEST_ROWS = 5
+PROBLEM_LINES = 6
+MIN_REFRESH = 0.2
+# Above CRITICAL, so nothing reaches the terminal under the live view
+CONSOLE_MUTED = 100
+
+
+def format_duration(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Dashboard:
+    """Live summary of the whole fleet in place of the per-session log stream.
+
+    Warnings and errors are still kept, the last few are shown at the bottom.
+    """
+
+    def __init__(self):
+        self.problems: deque[str] = deque(maxlen=PROBLEM_LINES)
+        self.started = monotonic()
+        self.task = None
+        self.sink = None
+
+    def start(self) -> None:
+        self.started = monotonic()
+        console_filter.level = CONSOLE_MUTED
+        self.sink = logger.add(lambda message: self.problems.append(message.rstrip()), level='WARNING',
+                               format="{time:HH:mm:ss} | {level: <8} | {message}", colorize=False)
+        self.task = asyncio.create_task(self.run(), name='dashboard')
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.sink is not None:
+            logger.remove(self.sink)
+            self.sink = None
+        console_filter.level = 0
+
+    async def run(self) -> None:
+        with Live(self.render(), auto_refresh=False, redirect_stdout=False, redirect_stderr=False) as live:
+            while True:
+                await asyncio.sleep(max(settings.DASHBOARD_REFRESH, MIN_REFRESH))
+                live.update(self.render(), refresh=True)
+
+    @staticmethod
+    def state_counts() -> Counter:
+        counts = Counter(STATE_OF_PHASE.get(tapper.phase, 'in phase') for tapper in fleet.tappers.values())
+        counts['quarantined'] = len(fleet.quarantined)
+        return counts
+
+    @staticmethod
+    def next_due() -> Table:
+        table = Table(title="Next due", box=box.SIMPLE, title_justify='left')
+        table.add_column("session")
+        table.add_column("in", justify='right')
+        table.add_column("last")
+        waiting = [tapper for tapper in fleet.tappers.values()
+                   if tapper.wake_at is not None and STATE_OF_PHASE.get(tapper.phase) in ('sleeping', 'backing off')]
+        now = time()
+        for tapper in nsmallest(QUEUE_ROWS, waiting, key=lambda tapper: tapper.wake_at):
+            entry = schedule.entries.get(tapper.session_name)
+            table.add_row(tapper.session_name, format_duration(tapper.wake_at - now), entry.status if entry else '')
+        return table
+
+    @staticmethod
+    def hosts(now: float) -> tuple[Table, float]:
+        table = Table(title="Hosts", box=box.SIMPLE, title_justify='left')
+        table.add_column("host")
+        table.add_column("req/s", justify='right')
+        table.add_column(f"errors {ERROR_WINDOW}s", justify='right')
+        total_rate = 0.0
+        for host, buffer in sorted(fleet.hosts.items()):
+            count, _, span = buffer.window(RATE_WINDOW, now)
+            rate = count / max(span, 1)
+            recent, failed, _ = buffer.window(ERROR_WINDOW, now)
+            total_rate += rate
+            share = failed / recent if recent else 0.0
+            table.add_row(host, f"{rate:.1f}", Text(f"{share:.1%}", style='red' if share >= 0.05 else ''))
+        return table, total_rate
+
+    @staticmethod
+    def slowest() -> Table:
+        table = Table(title="Slowest last cycle", box=box.SIMPLE, title_justify='left')
+        table.add_column("session")
+        table.add_column("took", justify='right')
+        for session_name, seconds in nlargest(SLOWEST_ROWS, fleet.cycle_seconds.items(), key=lambda item: item[1]):
+            table.add_row(session_name, format_duration(seconds))
+        return table
+
+    def render(self) -> Panel:
+        started = perf_counter()
+        now = monotonic()
+        counts = self.state_counts()
+        hosts, rate = self.hosts(now)
+
+        states = Text('  ').join(Text.assemble((str(counts[state]), 'bold cyan'), f" {state}") for state in STATES)
+
+        left, right = Group(states, self.next_due()), Group(hosts, self.slowest())
+        columns = Table.grid(padding=(0, 4))
+        columns.add_row(left, right)
+
+        problems = Text('\n'.join(self.problems) or 'none', style='yellow' if self.problems else 'dim')
+        title = (f"BLUM | {len(fleet.tappers)} sessions | {rate:.1f} req/s | "
+                 f"up {format_duration(now - self.started)}")
+        panel = Panel(Group(columns, Panel(problems, title="Recent warnings", title_align='left', box=box.SIMPLE)),
+                      title=title, border_style="dim blue")
+        metrics.observe('dashboard_render_seconds', perf_counter() - started)
+        return panel
+
+
+dashboard = Dashboard()
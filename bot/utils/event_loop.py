@@ -0,0 +1,21 @@
+import asyncio
+
+from bot.utils.logger import logger
+
+EVENT_LOOPS = ('asyncio', 'uvloop')
+
+
+def install_event_loop(name: str) -> str:
+    if name not in EVENT_LOOPS:
+        raise ValueError(f"Unknown event loop '{name}', expected one of: {', '.join(EVENT_LOOPS)}")
+
+    if name == 'uvloop':
+        try:
+            import uvloop
+        except ImportError:
+            logger.warning("uvloop is not installed (it is not available on Windows), using the default asyncio loop")
+            return 'asyncio'
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    return name
@@ -0,0 +1,46 @@
+import json
+
+from bot.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    def __init__(self, backend: str = 'auto'):
+        if backend == 'auto':
+            backend = 'orjson' if orjson is not None else 'json'
+        if backend == 'orjson' and orjson is None:
+            raise ValueError("JSON_BACKEND is 'orjson' but orjson is not installed")
+        if backend not in ('orjson', 'json'):
+            raise ValueError(f"Unknown JSON backend '{backend}'")
+
+        self.backend = backend
+        if backend == 'orjson':
+            self.loads = orjson.loads
+            self.dumps = self._orjson_dumps
+        else:
+            self.loads = json.loads
+            self.dumps = self._json_dumps
+
+    @staticmethod
+    def _orjson_dumps(obj, indent: bool = False) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+
+    @staticmethod
+    def _json_dumps(obj, indent: bool = False) -> str:
+        if indent:
+            return json.dumps(obj, indent=4, ensure_ascii=False)
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+codec = JsonCodec(settings.JSON_BACKEND)
+
+
+async def read_json(resp):
+    body = await resp.read()
+    if not body.strip():
+        return None
+    return codec.loads(body)
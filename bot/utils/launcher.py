@@ -7,14 +7,24 @@ import traceback
 
 from pyrogram import Client
 from bot.config import settings
-from bot.utils import logger
-from bot.core.tapper import run_tapper
+from bot.config.watcher import config_watcher
+from bot.utils.logger import logger
+from bot.utils.json_codec import codec
+from bot.core.tapper import Tapper, run_tapper, create_tg_client
+from bot.core.resolver import dns_cache
+from bot.core.schedule import schedule
 from bot.core.registrator import register_sessions
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 from rich.markdown import Markdown
 from bot.utils.banner import banner
+from bot.utils.sharding import Supervisor, shard_of
+from bot.utils.event_loop import EVENT_LOOPS
+from bot.utils.watchdog import watchdog
+from bot.utils.dashboard import dashboard
+from bot.utils.summary import log_summaries
+from bot.utils.coordination import SessionCoordinator, SQLiteLeaseBackend, default_node_id
 from bot.utils.documentation import get_documentation
 global tg_clients
 
@@ -74,8 +84,8 @@ def get_session_names() -> list[str]:
 
 def get_proxies() -> dict:
     try:
-        with open('bot/config/proxies/session_proxy.json', 'r') as f:
-            return json.load(f)
+        with open('bot/config/proxies/session_proxy.json', 'rb') as f:
+            return codec.loads(f.read())
     except FileNotFoundError:
         logger.error("session_proxy.json file not found")
         return {}
@@ -84,7 +94,7 @@ def get_proxies() -> dict:
         return {}
 
 
-async def get_tg_clients() -> list[Client]:
+async def get_tg_clients(shard: int = 0, shards: int = 1) -> list[Client]:
     global tg_clients
 
     session_names = get_session_names()
@@ -98,15 +108,9 @@ async def get_tg_clients() -> list[Client]:
     proxies = get_proxies() if settings.USE_PROXY else {}
 
     tg_clients = [
-        Client(
-            name=session_name,
-            api_id=settings.API_ID,
-            api_hash=settings.API_HASH,
-            workdir="sessions/",
-            plugins=dict(root="bot/plugins"),
-            proxy=proxies.get(session_name)
-        )
+        create_tg_client(session_name, proxy=proxies.get(session_name))
         for session_name in session_names
+        if shard_of(session_name, shards) == shard
     ]
 
     return tg_clients
@@ -123,9 +127,13 @@ def display_documentation(language='ru'):
 async def process() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("-a", "--action", type=int, help="Action to perform")
+    parser.add_argument("-w", "--workers", type=int, help="Number of worker processes to shard sessions across")
+    parser.add_argument("--loop", choices=EVENT_LOOPS, help="Event loop implementation (asyncio or uvloop)")
 
     args = parser.parse_args()
     action = args.action
+    workers = args.workers or settings.WORKERS
+    event_loop = args.loop or settings.EVENT_LOOP
 
     console = Console()
 
@@ -152,6 +160,17 @@ async def process() -> None:
 
         if action == 1:
             await smooth_progress("Starting the bot...", total_steps=100, duration=2)
+            if workers > 1:
+                if not get_session_names():
+                    raise FileNotFoundError("Not found session files")
+                try:
+                    await Supervisor(workers=workers, event_loop=event_loop).run()
+                except Exception as e:
+                    logger.error(f"Error running workers: {e}")
+                finally:
+                    action = None
+                continue
+
             tg_clients = await get_tg_clients()
             try:
                 await run_tasks(tg_clients=tg_clients)
@@ -195,21 +214,45 @@ async def process() -> None:
             action = None
 
 
-async def run_tasks(tg_clients: list[Client]):
+async def run_tasks(tg_clients: list[Client], node_id: str | None = None, standalone: bool = True):
     console = Console()
-    proxies = get_proxies() if settings.USE_PROXY else()
-    tasks = [
-        asyncio.create_task(
+    config_watcher.start(get_proxies())
+    watcher_task = asyncio.create_task(config_watcher.watch())
+    dns_task = asyncio.create_task(dns_cache.run(Tapper.known_hosts())) if settings.DNS_CACHE else None
+    if settings.WARM_RESTART:
+        schedule.load()
+    schedule_task = asyncio.create_task(schedule.run()) if settings.WARM_RESTART else None
+    if settings.WATCHDOG:
+        watchdog.start(settings.WATCHDOG_THRESHOLD)
+    if settings.DASHBOARD and standalone:
+        dashboard.start()
+    summary_task = asyncio.create_task(log_summaries()) if standalone else None
+    sessions = [tg_client.name for tg_client in tg_clients]
+    clients = {tg_client.name: tg_client for tg_client in tg_clients}
+    # Tappers drop their clients while asleep, so nothing here should keep them alive
+    tg_clients.clear()
+
+    def start_tapper(session_name: str) -> asyncio.Task:
+        return asyncio.create_task(
             run_tapper(
-                tg_client=tg_client,
-                proxy=proxies.get(tg_client.name) if settings.USE_PROXY else None
-            )
+                tg_client=clients.pop(session_name, None) or create_tg_client(session_name),
+                proxy=config_watcher.proxies.get(session_name) if settings.USE_PROXY else None
+            ),
+            name=session_name
         )
-        for tg_client in tg_clients
-    ]
 
     try:
-        await asyncio.gather(*tasks)
+        if settings.COORDINATION_DB:
+            coordinator = SessionCoordinator(
+                backend=SQLiteLeaseBackend(settings.COORDINATION_DB),
+                node_id=node_id or settings.NODE_ID or default_node_id(),
+                sessions=sessions,
+                start=start_tapper,
+                ttl=settings.LEASE_TTL
+            )
+            await coordinator.run()
+        else:
+            await asyncio.gather(*[start_tapper(session_name) for session_name in sessions])
     except asyncio.CancelledError:
         console.clear()
     except Exception as e:
@@ -217,5 +260,16 @@ async def run_tasks(tg_clients: list[Client]):
         logger.error(error_msg)
         console.print(Panel(error_msg, title="Error Details", style="bold red"))
     finally:
+        watcher_task.cancel()
+        if dns_task is not None:
+            dns_task.cancel()
+        if schedule_task is not None:
+            schedule_task.cancel()
+            # Its last save runs on the way out, wait for it so the snapshot is on disk before returning
+            await asyncio.gather(schedule_task, return_exceptions=True)
+        watchdog.stop()
+        dashboard.stop()
+        if summary_task is not None:
+            summary_task.cancel()
         logger.info("All tasks completed or stopped. Returning to menu.")
         banner()
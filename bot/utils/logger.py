@@ -1,17 +1,33 @@
 import sys
 from loguru import logger
 
+LOG_FORMAT = (
+    "<blue><b>[BLUM]</b></blue> "
+    "| <white>{time:HH:mm:ss}</white> "
+    "| <level>{level: <8}</level> "
+    "| <white><b>{message}</b></white>"
+)
+
+
+
+class ConsoleFilter:
+    # Raised while something else, like the dashboard, owns the terminal
+    def __init__(self):
+        self.level = 0
+
+    def __call__(self, record) -> bool:
+        return record['level'].no >= self.level
+
+
+console_filter = ConsoleFilter()
+
 logger.remove()
 
 logger.add(
     sink=sys.stdout,
-    format=(
-        "<blue><b>[BLUM]</b></blue> "
-        "| <white>{time:HH:mm:ss}</white> "
-        "| <level>{level: <8}</level> "
-        "| <white><b>{message}</b></white>"
-    ),
-    colorize=True
+    format=LOG_FORMAT,
+    colorize=True,
+    filter=console_filter
 )
 
 logger = logger.opt(colors=True)
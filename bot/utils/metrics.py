@@ -0,0 +1,113 @@
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {'buckets': list(self.buckets), 'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+    def merge(self, data: dict) -> None:
+        if tuple(data['buckets']) != self.buckets:
+            raise ValueError("cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, data['counts'])]
+        self.sum += data['sum']
+        self.count += data['count']
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: dict[tuple, float] = {}
+        self.gauges: dict[tuple, float] = {}
+        self.histograms: dict[tuple, Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, *sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self.gauges[self._key(name, labels)] = value
+
+    def histogram(self, name: str, buckets=DEFAULT_BUCKETS, **labels) -> Histogram:
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        return histogram
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        self.histogram(name, **labels).observe(value)
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get(self._key(name, labels), 0)
+
+    def total(self, name: str) -> float:
+        return sum(value for key, value in self.counters.items() if key[0] == name)
+
+    def gauge_total(self, name: str) -> float:
+        return sum(value for key, value in self.gauges.items() if key[0] == name)
+
+    def histogram_total(self, name: str) -> Histogram:
+        merged = None
+        for key, histogram in self.histograms.items():
+            if key[0] == name:
+                if merged is None:
+                    merged = Histogram(histogram.buckets)
+                merged.merge(histogram.to_dict())
+        return merged or Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            'counters': [[list(key), value] for key, value in self.counters.items()],
+            'gauges': [[list(key), value] for key, value in self.gauges.items()],
+            'histograms': [[list(key), histogram.to_dict()] for key, histogram in self.histograms.items()],
+        }
+
+    @staticmethod
+    def _unpack(key: list) -> tuple:
+        return (key[0], *(tuple(label) for label in key[1:]))
+
+    def merge(self, snapshot: dict) -> None:
+        for key, value in snapshot['counters']:
+            key = self._unpack(key)
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, value in snapshot['gauges']:
+            key = self._unpack(key)
+            self.gauges[key] = self.gauges.get(key, 0) + value
+        for key, data in snapshot['histograms']:
+            key = self._unpack(key)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(data['buckets'])
+            self.histograms[key].merge(data)
+
+
+metrics = Metrics()
@@ -0,0 +1,129 @@
+import asyncio
+import cProfile
+import inspect
+import io
+import os
+import pstats
+import tracemalloc
+from time import thread_time
+
+from bot.utils.logger import logger
+from bot.utils.metrics import metrics
+
+PROFILE_TARGETS = ('simulated', 'bot')
+TRACEMALLOC_FRAMES = 10
+
+
+async def run_bot(duration: float) -> None:
+    from bot.utils.launcher import get_tg_clients, run_tasks
+
+    try:
+        await asyncio.wait_for(run_tasks(tg_clients=await get_tg_clients()), timeout=duration)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def run_simulated(run_load, base_url: str, duration: float, sessions: int) -> None:
+    result = await run_load(base_url, sessions=sessions, duration=duration, idle=5)
+    logger.info(f"Profile | Simulated <ly>{sessions}</ly> sessions, "
+                f"<ly>{result['requests_per_second']:.0f}</ly> req/s, <ly>{result['errors']}</ly> errors")
+
+
+def write_cpu_reports(profiler: cProfile.Profile, report_dir: str, top: int) -> None:
+    profiler.dump_stats(os.path.join(report_dir, 'cpu.prof'))
+
+    for sort in ('tottime', 'cumulative'):
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(top)
+        with open(os.path.join(report_dir, f'cpu_by_{sort}.txt'), 'w') as report:
+            report.write(output.getvalue())
+
+
+def write_tapper_report(profiler: cProfile.Profile, report_dir: str) -> None:
+    from bot.core.tapper import Tapper
+
+    # A coroutine is "called" again on every resume, so its times only cover the slices it actually ran
+    tapper_file = inspect.getsourcefile(Tapper)
+    rows = [
+        (name, calls, tottime, cumtime)
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in pstats.Stats(profiler).stats.items()
+        if filename == tapper_file
+    ]
+    rows.sort(key=lambda row: row[3], reverse=True)
+
+    with open(os.path.join(report_dir, 'tapper_methods.txt'), 'w') as report:
+        report.write(f"{'method':<32} {'resumes':>10} {'own CPU s':>10} {'total CPU s':>12}\n")
+        for name, calls, tottime, cumtime in rows:
+            report.write(f"{name:<32} {calls:>10} {tottime:>10.3f} {cumtime:>12.3f}\n")
+
+
+def write_phase_report(report_dir: str) -> None:
+    rows = sorted(
+        (dict(key[1:])['phase'], histogram)
+        for key, histogram in metrics.histograms.items()
+        if key[0] == 'phase_seconds'
+    )
+
+    with open(os.path.join(report_dir, 'phases.txt'), 'w') as report:
+        report.write(f"{'phase':<16} {'count':>8} {'wall s':>10} {'mean s':>8} {'p50 <=':>8} {'p99 <=':>8}\n")
+        for phase, histogram in rows:
+            report.write(f"{phase:<16} {histogram.count:>8} {histogram.sum:>10.2f} "
+                         f"{histogram.sum / max(histogram.count, 1):>8.3f} "
+                         f"{histogram.quantile(0.5):>8} {histogram.quantile(0.99):>8}\n")
+
+
+def write_allocation_report(snapshot: tracemalloc.Snapshot, report_dir: str, top: int) -> None:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ))
+
+    with open(os.path.join(report_dir, 'allocations.txt'), 'w') as report:
+        for title, key in (('By line', 'lineno'), ('By call stack', 'traceback')):
+            report.write(f"{title}, top {top}\n\n")
+            for stat in snapshot.statistics(key)[:top]:
+                report.write(f"{stat.size / 1024:10.1f} KiB {stat.count:>8} blocks\n")
+                for line in stat.traceback.format(limit=TRACEMALLOC_FRAMES if key == 'traceback' else 1):
+                    report.write(f"    {line}\n")
+            report.write("\n")
+
+
+def run_profile(duration: float, report_dir: str = 'profile', target: str = 'simulated',
+                sessions: int = 200, top: int = 50) -> None:
+    server = None
+
+    if target == 'simulated':
+        # The stand-in server and load generator ship with the source tree, not with the bot itself
+        try:
+            from benchmarks.bench_loop import run_load
+            from benchmarks.standin import spawn_standin
+        except ImportError as e:
+            logger.error(f"Profile | The simulated target needs the benchmarks/ package of a source checkout, "
+                         f"run from the repository root or use --profile-target bot ({e})")
+            return
+
+        server, base_url = spawn_standin()
+        workload = run_simulated(run_load, base_url, duration, sessions)
+    else:
+        workload = run_bot(duration)
+    os.makedirs(report_dir, exist_ok=True)
+
+    logger.info(f"Profile | Running <ly>{target}</ly> workload for <ly>{duration:.0f}s</ly>")
+    profiler = cProfile.Profile(timer=thread_time)
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    profiler.enable()
+    try:
+        asyncio.run(workload)
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        if server is not None:
+            server.terminate()
+
+        write_cpu_reports(profiler, report_dir, top)
+        write_tapper_report(profiler, report_dir)
+        write_phase_report(report_dir)
+        write_allocation_report(snapshot, report_dir, top)
+        logger.info(f"Profile | Reports written to <ly>{os.path.abspath(report_dir)}</ly>")
@@ -0,0 +1,181 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+import sys
+import zlib
+from time import monotonic
+
+from bot.utils.event_loop import install_event_loop
+from bot.utils.logger import logger, LOG_FORMAT
+from bot.utils.metrics import metrics, Metrics
+from bot.utils.summary import fleet_summary
+
+METRICS_INTERVAL = 10
+SUMMARY_INTERVAL = 60
+MAX_RESTART_DELAY = 60
+
+
+def shard_of(session_name: str, shards: int) -> int:
+    return zlib.crc32(session_name.encode()) % shards
+
+
+async def report_metrics(shard: int, channel) -> None:
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        channel.put(('metrics', shard, metrics.snapshot()))
+
+
+async def run_shard(shard: int, shards: int, channel) -> None:
+    from bot.config import settings
+    from bot.utils.coordination import default_node_id
+    from bot.utils.launcher import get_tg_clients, run_tasks
+
+    # With lease coordination every worker is a node of its own and leases decide the split
+    if settings.COORDINATION_DB:
+        tg_clients = await get_tg_clients()
+        node_id = f"{settings.NODE_ID or default_node_id()}-{shard}"
+    else:
+        tg_clients = await get_tg_clients(shard=shard, shards=shards)
+        node_id = None
+
+    if not tg_clients:
+        logger.info(f"Worker #{shard} | No sessions assigned to this shard")
+        return
+
+    logger.info(f"Worker #{shard} | Running <ly>{len(tg_clients)}</ly> sessions")
+    reporter = asyncio.create_task(report_metrics(shard, channel))
+    try:
+        # The supervisor merges worker output and metrics; a live view or summary per worker would only repeat it
+        await run_tasks(tg_clients=tg_clients, node_id=node_id, standalone=False)
+    finally:
+        reporter.cancel()
+        channel.put(('metrics', shard, metrics.snapshot()))
+
+
+def worker_main(shard: int, shards: int, channel, event_loop: str = 'asyncio') -> None:
+    # The supervisor owns shutdown; workers are terminated explicitly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    logger.remove()
+    logger.add(sink=lambda message: channel.put(('log', shard, str(message))), format=LOG_FORMAT, colorize=True)
+
+    install_event_loop(event_loop)
+    asyncio.run(run_shard(shard, shards, channel))
+
+
+class Worker:
+    def __init__(self, shard: int):
+        self.shard = shard
+        self.process = None
+        self.restarts = 0
+        self.restart_at = 0.0
+        self.snapshot = None
+
+
+class Supervisor:
+    def __init__(self, workers: int, event_loop: str = 'asyncio'):
+        self.event_loop = event_loop
+        self.context = multiprocessing.get_context('spawn')
+        self.channel = self.context.Queue()
+        self.workers = [Worker(shard) for shard in range(workers)]
+        self.retired = Metrics()
+        self.stopping = False
+
+    def spawn(self, worker: Worker) -> None:
+        worker.process = self.context.Process(
+            target=worker_main,
+            args=(worker.shard, len(self.workers), self.channel, self.event_loop),
+            name=f"blum-worker-{worker.shard}",
+            daemon=True
+        )
+        worker.process.start()
+        logger.info(f"Worker #{worker.shard} started (pid <ly>{worker.process.pid}</ly>)")
+
+    def drain(self) -> None:
+        while True:
+            try:
+                kind, shard, payload = self.channel.get_nowait()
+            except queue.Empty:
+                return
+
+            if kind == 'log':
+                sys.stdout.write(payload)
+                sys.stdout.flush()
+            elif kind == 'metrics':
+                self.workers[shard].snapshot = payload
+
+    def supervise(self) -> None:
+        now = monotonic()
+        for worker in self.workers:
+            process = worker.process
+            if process is None:
+                if now >= worker.restart_at:
+                    self.spawn(worker)
+                continue
+
+            if process.is_alive():
+                continue
+
+            if process.exitcode == 0:
+                logger.info(f"Worker #{worker.shard} finished")
+                worker.process = None
+                worker.restart_at = float('inf')
+                continue
+
+            # Keep the counters of the crashed incarnation in the fleet totals; its gauges died with it
+            if worker.snapshot is not None:
+                self.retired.merge({**worker.snapshot, 'gauges': []})
+                worker.snapshot = None
+
+            worker.restarts += 1
+            delay = min(MAX_RESTART_DELAY, 2 ** worker.restarts)
+            worker.process = None
+            worker.restart_at = now + delay
+            metrics.inc('worker_restarts_total', shard=worker.shard)
+            logger.error(f"Worker #{worker.shard} crashed with exit code {process.exitcode}, "
+                         f"restarting in {delay}s")
+
+    def aggregated(self) -> Metrics:
+        total = Metrics()
+        total.merge(self.retired.snapshot())
+        for worker in self.workers:
+            if worker.snapshot is not None:
+                total.merge(worker.snapshot)
+        return total
+
+    def log_summary(self) -> None:
+        total = self.aggregated()
+        alive = sum(1 for worker in self.workers if worker.process is not None and worker.process.is_alive())
+        restarts = metrics.total('worker_restarts_total')
+        logger.info(f"Fleet | workers <ly>{alive}/{len(self.workers)}</ly>, restarts <ly>{restarts:.0f}</ly> | "
+                    f"{fleet_summary(total)}")
+
+    async def run(self) -> None:
+        logger.info(f"Starting <ly>{len(self.workers)}</ly> worker processes")
+        next_summary = monotonic() + SUMMARY_INTERVAL
+        try:
+            while not self.stopping:
+                self.drain()
+                self.supervise()
+
+                if all(worker.process is None and worker.restart_at == float('inf') for worker in self.workers):
+                    break
+
+                if monotonic() >= next_summary:
+                    self.log_summary()
+                    next_summary = monotonic() + SUMMARY_INTERVAL
+
+                await asyncio.sleep(0.2)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self.stopping = True
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+        self.drain()
@@ -0,0 +1,44 @@
+import asyncio
+
+from bot.config import settings
+from bot.utils.logger import logger
+from bot.utils.metrics import metrics, Metrics
+
+
+def ms(seconds: float) -> str:
+    return '>300s' if seconds == float('inf') else f"{seconds * 1000:.0f}ms"
+
+
+def share(part: float, whole: float) -> str:
+    return f"{part / whole:.0%}" if whole else '-'
+
+
+def fleet_summary(total: Metrics) -> str:
+    limiter_wait = total.histogram_total('limiter_wait_seconds')
+    loop_lag = total.histogram_total('loop_lag_seconds')
+    dns_hits, dns_misses = total.total('dns_cache_hits_total'), total.total('dns_cache_misses_total')
+    cache_hits, cache_misses = total.total('http_cache_hits_total'), total.total('http_cache_misses_total')
+    cache_coalesced = total.total('http_cache_coalesced_total')
+
+    parts = [
+        f"cycles <green>{total.total('cycles_total'):.0f}</green>",
+        f"errors <red>{total.total('cycle_errors_total'):.0f}</red>",
+        f"limiter wait p50 <ly>{ms(limiter_wait.quantile(0.5))}</ly> p95 <ly>{ms(limiter_wait.quantile(0.95))}</ly>, "
+        f"queued <ly>{total.gauge_total('limiter_queued'):.0f}</ly>",
+        f"in flight <ly>{total.gauge_total('concurrency_in_flight'):.0f}"
+        f"/{total.gauge_total('concurrency_limit'):.0f}</ly>",
+        f"slots waiting <ly>{total.gauge_total('dispatcher_queued'):.0f}</ly>",
+        f"DNS hits <cyan>{share(dns_hits, dns_hits + dns_misses)}</cyan>",
+        f"HTTP cache hits <cyan>{cache_hits:.0f}</cyan> coalesced <cyan>{cache_coalesced:.0f}</cyan> "
+        f"misses <cyan>{cache_misses:.0f}</cyan>",
+    ]
+    if loop_lag.count:
+        parts.append(f"loop lag p99 <ly>{ms(loop_lag.quantile(0.99))}</ly>")
+    return ' | '.join(parts)
+
+
+async def log_summaries() -> None:
+    # Single-process runs; with workers the supervisor logs the merged figures instead
+    while settings.METRICS_LOG_INTERVAL > 0:
+        await asyncio.sleep(settings.METRICS_LOG_INTERVAL)
+        logger.info(f"Fleet | {fleet_summary(metrics)}")
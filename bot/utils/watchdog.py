@@ -0,0 +1,90 @@
+import asyncio
+import sys
+import threading
+import traceback
+from time import monotonic
+
+from bot.utils.logger import logger
+from bot.utils.metrics import metrics
+
+PROBE_INTERVAL = 0.1
+MAX_STACK_FRAMES = 25
+
+
+def find_tapper(frame):
+    # The innermost frame that runs on behalf of an account tells which session and phase blocked
+    while frame is not None:
+        owner = frame.f_locals.get('self')
+        if hasattr(owner, 'session_name') and hasattr(owner, 'phase'):
+            return owner
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    def __init__(self, threshold: float = 0.5, interval: float = PROBE_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.loop = None
+        self.loop_thread_id = None
+        self.heartbeat = 0.0
+        self.reported = None
+        self.stopped = threading.Event()
+        self.probe_task = None
+        self.monitor_thread = None
+
+    def start(self, threshold: float | None = None) -> None:
+        if threshold:
+            self.threshold = threshold
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = monotonic()
+        self.stopped.clear()
+        self.probe_task = asyncio.create_task(self.probe(), name='watchdog')
+        self.monitor_thread = threading.Thread(target=self.monitor, name='loop-watchdog', daemon=True)
+        self.monitor_thread.start()
+        logger.info(f"Watchdog | Reporting event loop stalls longer than <ly>{self.threshold}s</ly>")
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.probe_task is not None:
+            self.probe_task.cancel()
+            self.probe_task = None
+
+    async def probe(self) -> None:
+        while True:
+            started = monotonic()
+            await asyncio.sleep(self.interval)
+            self.heartbeat = monotonic()
+            lag = max(0.0, self.heartbeat - started - self.interval)
+            metrics.observe('loop_lag_seconds', lag)
+            if lag >= self.threshold:
+                logger.warning(f"Watchdog | Event loop resumed after <ly>{lag:.2f}s</ly>")
+
+    def monitor(self) -> None:
+        while not self.stopped.wait(min(self.interval, self.threshold / 4)):
+            heartbeat = self.heartbeat
+            blocked = monotonic() - heartbeat - self.interval
+            if blocked < self.threshold or self.reported == heartbeat:
+                continue
+
+            self.reported = heartbeat
+            metrics.inc('loop_stalls_total')
+            self.report(blocked)
+
+    def report(self, blocked: float) -> None:
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return
+
+        stack = ''.join(traceback.format_stack(frame, limit=MAX_STACK_FRAMES)).replace('<', r'\<')
+        task = asyncio.current_task(self.loop)
+        tapper = find_tapper(frame)
+
+        session = tapper.session_name if tapper is not None else task.get_name() if task is not None else '-'
+        phase = tapper.phase if tapper is not None else '-'
+        logger.warning(f"Watchdog | Event loop blocked for <ly>{blocked:.2f}s</ly> "
+                       f"| session <ly>{session}</ly> | phase <ly>{phase}</ly>\n{stack}")
+
+
+watchdog = LoopWatchdog()
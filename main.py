@@ -1,12 +1,16 @@
+import argparse
 import asyncio
 import sys
 import os
 import signal
 
+from bot.config import settings
 from bot.utils.banner import banner
 from bot.utils.logger import logger
 from bot.utils.launcher import process
 from bot.utils.connection_manager import connection_manager
+from bot.utils.event_loop import install_event_loop
+from bot.utils.profiler import PROFILE_TARGETS, run_profile
 
 def suppress_errors():
     sys.stderr = open(os.devnull, 'w')
@@ -23,8 +27,27 @@ def signal_handler(signum, frame):
     sys.exit(0)
 
 
+def parse_main_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--loop")
+    parser.add_argument("--profile", type=float, metavar="SECONDS")
+    parser.add_argument("--profile-dir", default="profile")
+    parser.add_argument("--profile-target", choices=PROFILE_TARGETS, default="simulated")
+    parser.add_argument("--profile-sessions", type=int, default=200)
+    args, _ = parser.parse_known_args()
+    return args
+
+
 if __name__ == '__main__':
     banner()
+    args = parse_main_args()
+    install_event_loop(args.loop or settings.EVENT_LOOP)
+
+    if args.profile:
+        run_profile(duration=args.profile, report_dir=args.profile_dir, target=args.profile_target,
+                    sessions=args.profile_sessions)
+        sys.exit(0)
+
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 